@@ -0,0 +1,41 @@
+#!/bin/bash
+# Замеры горячих страниц YaNews и YaNote со сравнением с эталоном.
+# Аргументы передаются обоим скриптам, например:
+#   ./run_benchmarks.sh --requests 1000 --update-baseline
+
+print_message () {
+    # Print the line with message (first argument) on the full terminal width
+    # using second argument to fill the space.
+    # The default color is green. To switch to red pass a third argument with any value.
+    local terminal_width=$(tput cols 2>/dev/null || echo 80)
+    local message=$1
+    local symbol=$2
+    local half_way=$((($terminal_width-${#message})/2))
+    local left_filler_len=$(printf "%${half_way}s")
+    local right_filler_len=$(printf "%$(($terminal_width-$half_way-${#message}))s")
+    if [[ ! -z "$3" ]]; then echo -e "\033[0;31m"; else echo -e "\033[0;32m"; fi
+    echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
+}
+
+
+cd ya_news
+export DJANGO_SETTINGS_MODULE="yanews.settings"
+print_message " YaNews " "="
+if python -m benchmarks.bench_requests "$@";
+then
+    cd ../ya_note
+    export DJANGO_SETTINGS_MODULE="yanote.settings"
+    print_message " YaNote " "="
+    if python -m benchmarks.bench_requests "$@";
+    then
+        exit 0
+    else
+        status=$?
+        print_message " Замеры YaNote хуже эталона или не выполнились " "=" 1
+        exit $status
+    fi
+else
+    status=$?
+    print_message " Замеры YaNews хуже эталона или не выполнились " "=" 1
+    exit $status
+fi
@@ -0,0 +1,44 @@
+"""
+Объём данных, которые главная страница забирает из базы.
+
+Сравнивает выборку полных строк новостей (как до появления анонса)
+с выборкой NewsList.get_queryset(): только нужные шаблону колонки
+и сохранённый анонс вместо полного текста.
+
+Запуск из директории ya_news:
+    python -m benchmarks.bench_list_bytes
+"""
+import tempfile
+from pathlib import Path
+
+from benchmarks.utils import fetched_bytes, setup_django, test_database
+
+TEXT_WORDS = (100, 1_000, 10_000)
+
+
+def main():
+    setup_django()
+    from django.conf import settings
+    from django.test import RequestFactory
+
+    from news.models import News
+    from news.views import NewsList
+
+    view = NewsList()
+    view.setup(RequestFactory().get('/'))
+    news_count = settings.NEWS_COUNT_ON_HOME_PAGE
+    print(f'{"слов в тексте":>14} {"было, байт":>12} {"стало, байт":>12}')
+    with tempfile.TemporaryDirectory() as directory:
+        with test_database(Path(directory) / 'list_bytes.sqlite3'):
+            for words in TEXT_WORDS:
+                News.objects.all().delete()
+                text = ' '.join(['новость'] * words)
+                for index in range(news_count):
+                    News.objects.create(title=f'Новость {index}', text=text)
+                before = fetched_bytes(News.objects.all()[:news_count])
+                after = fetched_bytes(view.get_queryset())
+                print(f'{words:>14} {before:>12} {after:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Микробенчмарк проверки комментариев на запрещённые слова.
+
+Сравнивает старый построчный поиск (`word in text` по каждому слову)
+со скомпилированным BadWordsMatcher на растущих словарях и текстах.
+
+Запуск из директории ya_news:
+    python -m benchmarks.bench_moderation
+"""
+import random
+import timeit
+
+from news.moderation import BadWordsMatcher, normalize
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+DICTIONARY_SIZES = (10, 1_000, 10_000)
+TEXT_LENGTHS = (1_000, 10_000, 100_000)
+REPEAT = 5
+
+
+def make_words(rnd, count):
+    return [
+        ''.join(rnd.choices(ALPHABET, k=rnd.randint(5, 12)))
+        for _ in range(count)
+    ]
+
+
+def make_text(rnd, length):
+    words = []
+    size = 0
+    while size < length:
+        word = ''.join(rnd.choices(ALPHABET, k=rnd.randint(2, 9)))
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length]
+
+
+def naive_search(words, text):
+    lowered_text = normalize(text)
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def best_time(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main():
+    rnd = random.Random(42)
+    texts = {length: make_text(rnd, length) for length in TEXT_LENGTHS}
+    print(f'{"слов":>8} {"символов":>10} {"наивно, мс":>12} '
+          f'{"матчер, мс":>12} {"мкс/1000 симв.":>15}')
+    for size in DICTIONARY_SIZES:
+        words = make_words(rnd, size)
+        matcher = BadWordsMatcher(words)
+        for length, text in texts.items():
+            naive = best_time(lambda: naive_search(matcher.words, text))
+            compiled = best_time(lambda: matcher.search(text))
+            print(f'{size:>8} {length:>10} {naive * 1000:>12.2f} '
+                  f'{compiled * 1000:>12.2f} '
+                  f'{compiled * 1e9 / length:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Пропускная способность и задержки горячих страниц YaNews.
+
+Создаёт временную файловую базу, заполняет её командой seed
+и тестовым клиентом Django гоняет сценарии: главную, новость
+с коротким и с самым длинным обсуждением и отправку комментария.
+Длинное обсуждение каждый раз отрисовывается заново, без кэша
+фрагментов: иначе замерялось бы только чтение готового фрагмента.
+Результаты пишутся в JSON и сравниваются с эталоном (см.
+benchmarks/suite.py); при регрессии скрипт завершается с кодом 1.
+
+Запуск из директории ya_news (или ./run_benchmarks.sh из корня):
+    python -m benchmarks.bench_requests --requests 500
+"""
+import argparse
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from benchmarks import suite
+from benchmarks.utils import setup_django, test_database
+
+HOST = 'localhost'
+
+
+def scenarios(client, author_client):
+    from django.core.cache import cache
+    from django.urls import reverse
+
+    from news.models import News
+
+    commented = News.objects.filter(comment_count__gt=0)
+    small = commented.order_by('comment_count', 'id').first()
+    huge = commented.order_by('-comment_count', 'id').first()
+    small_url = reverse('news:detail', args=(small.id,))
+    return (
+        ('news:home', suite.request(client.get, reverse('news:home'), 200)),
+        ('news:detail:small', suite.request(client.get, small_url, 200)),
+        ('news:detail:huge', suite.request(
+            client.get, reverse('news:detail', args=(huge.id,)), 200,
+            before=cache.clear,
+        )),
+        # Запись идёт последней, чтобы не менять данные для чтения.
+        ('news:detail:post', suite.request(
+            author_client.post, small_url, 302,
+            data=lambda: {'text': 'Спасибо за новость!'},
+        )),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--news', type=int, default=10_000)
+    parser.add_argument('--comments', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    suite.add_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+
+    # Замеры без журнала SQL-запросов режима отладки, как на сервере.
+    settings.DEBUG = False
+    params = {
+        'users': args.users, 'news': args.news, 'comments': args.comments,
+        'seed': args.seed, 'requests': args.requests,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        with test_database(Path(directory) / 'requests.sqlite3'):
+            call_command(
+                'seed', users=args.users, news=args.news,
+                comments=args.comments, seed=args.seed, stdout=StringIO(),
+            )
+            client = Client(HTTP_HOST=HOST)
+            author_client = Client(HTTP_HOST=HOST)
+            author_client.force_login(get_user_model().objects.first())
+            results = suite.run(
+                scenarios(client, author_client), args.requests
+            )
+    suite.finish('ya_news', params, results, args)
+
+
+if __name__ == '__main__':
+    main()
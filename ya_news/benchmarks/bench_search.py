@@ -0,0 +1,122 @@
+"""
+Поиск новостей: индекс FTS5 против сканирования icontains.
+
+Заполняет временную файловую базу синтетическими новостями
+(по умолчанию миллион строк; индекс заполняют триггеры миграции
+0008_news_search) и для нескольких запросов сравнивает время первой
+страницы результатов и их подсчёта у search_news() и у фильтра
+title__icontains | text__icontains.
+
+Запуск из директории ya_news:
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from benchmarks.utils import setup_django, test_database
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ло', 'на', 'те', 'ви', 'до', 'су', 'пе',
+    'лю', 'ба', 'го', 'ре', 'зо', 'ны', 'ша', 'ку', 'ти', 'ме',
+)
+VOCABULARY_SIZE = 20_000
+TITLE_WORDS = 6
+TEXT_WORDS = 40
+BATCH_SIZE = 10_000
+SEED = 20261018
+QUERIES = ('новость', 'калоны', 'рота мина')
+REPEATS = 5
+
+
+def vocabulary(rnd):
+    words = {'новость', 'новости', 'калона', 'ротами', 'мина'}
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def fill(cursor, rows):
+    from django.db import connection
+    from django.utils import timezone
+
+    rnd = random.Random(SEED)
+    words = vocabulary(rnd)
+    # Распределение слов неравномерное, как в живом тексте.
+    weights = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    today = date.today()
+    updated = connection.ops.adapt_datetimefield_value(timezone.now())
+    for start in range(0, rows, BATCH_SIZE):
+        batch = []
+        for number in range(start, min(start + BATCH_SIZE, rows)):
+            title = rnd.choices(words, cum_weights=weights, k=TITLE_WORDS)
+            text = rnd.choices(words, cum_weights=weights, k=TEXT_WORDS)
+            batch.append((
+                ' '.join(title).capitalize(), ' '.join(text),
+                today - timedelta(days=number % 3650), '', 0, updated,
+            ))
+        cursor.executemany(
+            'INSERT INTO news_news (title, text, date, summary, '
+            'comment_count, updated) VALUES (%s, %s, %s, %s, %s, %s)',
+            batch,
+        )
+
+
+def timed(callable_):
+    best = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        callable_()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, transaction
+    from django.db.models import Q
+
+    from news.models import News
+    from news.search import search_news
+
+    per_page = settings.NEWS_SEARCH_RESULTS_PER_PAGE
+    news = News.objects.only('id', 'title', 'date', 'summary')
+
+    def scan(query):
+        condition = Q()
+        for word in query.split():
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return news.filter(condition).order_by('-date', '-id')
+
+    with tempfile.TemporaryDirectory() as directory:
+        with test_database(Path(directory) / 'search.sqlite3'):
+            started = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                fill(cursor, args.rows)
+            print(f'{args.rows} строк и индекс: '
+                  f'{time.perf_counter() - started:.1f} с')
+            print(f'{"запрос":>12} {"найдено":>9} {"FTS5, мс":>10} '
+                  f'{"icontains, мс":>14}')
+            for query in QUERIES:
+                found = search_news(news, query)
+                scanned = scan(query)
+                fts = timed(lambda: (list(found[:per_page]), found.count()))
+                like = timed(
+                    lambda: (list(scanned[:per_page]), scanned.count())
+                )
+                print(f'{query:>12} {found.count():>9} {fts:>10.1f} '
+                      f'{like:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Пропускная способность SQLite при параллельных чтении и записи.
+
+Читатели открывают главную и страницу новости, писатели в то же время
+добавляют комментарии. Сравниваются стандартный бэкенд без
+постоянных соединений и yanews.sqlite3 (WAL, PRAGMA) с CONN_MAX_AGE.
+
+Каждый читатель и писатель — отдельный процесс со своим соединением,
+как воркеры сервера: потоки одного процесса упирались бы в GIL, а не
+в блокировки базы. Кэш фрагментов на время замера выключен, иначе
+почти все чтения отдавались бы из памяти без обращения к базе.
+Каждая конфигурация в каждом повторе получает свою файловую базу:
+режим WAL сохраняется в файле.
+
+Запуск из директории ya_news:
+    python -m benchmarks.bench_sqlite_concurrency --seconds 5 --repeats 3
+"""
+import argparse
+import multiprocessing
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import percentile, setup_django
+
+CONFIGS = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0},
+    'tuned': {'ENGINE': 'yanews.sqlite3', 'CONN_MAX_AGE': 60},
+}
+NEWS_COUNT = 20
+
+
+def use_database(config, path, directory):
+    """
+    Переключает алиас default на базу path и выключает кэш фрагментов.
+
+    Версии фрагментов по-прежнему в файловом кэше, но во временной
+    директории замера.
+    """
+    from django.db import connections
+    from django.test.utils import override_settings
+
+    override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+        'versions': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': Path(directory) / 'versions',
+            'TIMEOUT': None,
+        },
+    }).enable()
+    connections.close_all()
+    connections.databases['default'].update(CONFIGS[config], NAME=path)
+    # Соединение этого потока создано со старым бэкендом.
+    del connections['default']
+
+
+def seed():
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from news.models import News
+
+    call_command('migrate', verbosity=0)
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости')
+        for index in range(NEWS_COUNT)
+    )
+    return (
+        list(News.objects.values_list('pk', flat=True)),
+        get_user_model().objects.create(username='Писатель').pk,
+    )
+
+
+def worker(database, news_ids, writer_id, number, write, seconds,
+           barrier, results):
+    """Процесс читателя или писателя; итог кладёт в очередь results."""
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    settings.DEBUG = False
+    setup_test_environment()
+    use_database(*database)
+    client = Client()
+    if write:
+        client.force_login(get_user_model().objects.get(pk=writer_id))
+    connection.close()
+    own = []
+    errors = 0
+    step = number
+    barrier.wait()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        step += 1
+        url = f'/news/{news_ids[step % len(news_ids)]}/'
+        started = time.perf_counter()
+        try:
+            if write:
+                client.post(url, {'text': f'Комментарий {step}'})
+            elif step % 2:
+                client.get('/')
+            else:
+                client.get(url)
+        except OperationalError:
+            # database is locked: писатель не дождался блокировки.
+            errors += 1
+            continue
+        own.append(time.perf_counter() - started)
+    connection.close()
+    results.put(('write' if write else 'read', own, errors))
+
+
+def run(database, readers, writers, seconds):
+    """Заполняет базу и гоняет readers + writers процессов."""
+    from django.db import connections
+
+    use_database(*database)
+    news_ids, writer_id = seed()
+    connections.close_all()
+    context = multiprocessing.get_context('spawn')
+    # Отсчёт начинается, когда все процессы подняли Django.
+    barrier = context.Barrier(readers + writers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(
+            database, news_ids, writer_id, number, number < writers,
+            seconds, barrier, results,
+        ))
+        for number in range(readers + writers)
+    ]
+    for process in processes:
+        process.start()
+    stats = {'read': [], 'write': [], 'errors': 0}
+    for _ in processes:
+        kind, latencies, errors = results.get()
+        stats[kind].extend(latencies)
+        stats['errors'] += errors
+    for process in processes:
+        process.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    print(f'{"бэкенд":>8} {"повтор":>7} {"чтений/с":>10} {"записей/с":>10} '
+          f'{"p99 чтения, мс":>15} {"p99 записи, мс":>15} {"ошибок":>7}')
+    rates = {config: [] for config in CONFIGS}
+    with tempfile.TemporaryDirectory() as directory:
+        for repeat in range(1, args.repeats + 1):
+            for config in CONFIGS:
+                path = Path(directory) / f'{config}-{repeat}.sqlite3'
+                stats = run(
+                    (config, path, directory),
+                    args.readers, args.writers, args.seconds,
+                )
+                reads = len(stats['read']) / args.seconds
+                writes = len(stats['write']) / args.seconds
+                rates[config].append((reads, writes))
+                print(f'{config:>8} {repeat:>7} {reads:>10.0f} '
+                      f'{writes:>10.0f} '
+                      f'{percentile(stats["read"], 0.99) * 1000:>15.1f} '
+                      f'{percentile(stats["write"], 0.99) * 1000:>15.1f} '
+                      f'{stats["errors"]:>7}')
+        from django.db import connections
+        connections.close_all()
+    for config, values in rates.items():
+        reads, writes = zip(*values)
+        print(f'{config}: медиана {statistics.median(reads):.0f} чтений/с, '
+              f'{statistics.median(writes):.0f} записей/с')
+
+
+if __name__ == '__main__':
+    main()
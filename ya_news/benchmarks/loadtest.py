@@ -0,0 +1,138 @@
+"""
+Нагрузочное сравнение страниц чтения под WSGI и ASGI.
+
+Поднимает локальный сервер (gunicorn для WSGI, uvicorn для ASGI
+с NEWS_ASYNC_VIEWS = True), отправляет запросы из нескольких потоков
+и печатает число запросов в секунду и задержки p50/p99.
+
+Нужны установленные gunicorn и uvicorn и заполненная база
+(python manage.py migrate и, например, python manage.py seed).
+
+Запуск из директории ya_news:
+    python -m benchmarks.loadtest --path / --path /news/1/
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.utils import percentile
+
+HOST = '127.0.0.1'
+SERVERS = {
+    'wsgi': (
+        'yanews.settings',
+        ['gunicorn', 'yanews.wsgi:application', '--workers', '1',
+         '--threads', '{workers}', '--bind', '{host}:{port}'],
+    ),
+    'asgi': (
+        'benchmarks.settings_async',
+        ['uvicorn', 'yanews.asgi:application', '--workers', '1',
+         '--host', '{host}', '--port', '{port}', '--log-level', 'warning'],
+    ),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex((HOST, port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f'Сервер не поднялся на порту {port}')
+
+
+def start_server(kind, port, workers):
+    settings_module, command = SERVERS[kind]
+    command = [
+        part.format(host=HOST, port=port, workers=workers)
+        for part in command
+    ]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    return subprocess.Popen(command, env=env)
+
+
+def load(port, paths, concurrency, requests):
+    """Обходит paths по кругу из concurrency потоков."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        connection = http.client.HTTPConnection(HOST, port, timeout=30)
+        own = []
+        for number in counter:
+            path = paths[number % len(paths)]
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException) as error:
+                errors.append(error)
+                connection.close()
+                connection = http.client.HTTPConnection(
+                    HOST, port, timeout=30
+                )
+            own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--path', action='append', dest='paths')
+    parser.add_argument('--server', action='append', dest='servers',
+                        choices=SERVERS)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    paths = args.paths or ['/']
+    print(f'{"сервер":>8} {"запр./с":>10} {"p50, мс":>10} '
+          f'{"p99, мс":>10} {"ошибок":>8}')
+    for kind in args.servers or list(SERVERS):
+        port = free_port()
+        try:
+            server = start_server(kind, port, args.workers)
+        except FileNotFoundError as error:
+            sys.exit(f'{kind}: не найден сервер ({error.filename})')
+        try:
+            wait_for_port(port)
+            load(port, paths, args.concurrency, args.concurrency)
+            latencies, errors, elapsed = load(
+                port, paths, args.concurrency, args.requests
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        print(f'{kind:>8} {len(latencies) / elapsed:>10.0f} '
+              f'{percentile(latencies, 0.5) * 1000:>10.1f} '
+              f'{percentile(latencies, 0.99) * 1000:>10.1f} '
+              f'{len(errors):>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+from yanews.settings import *  # noqa: F401,F403
+
+NEWS_ASYNC_VIEWS = True
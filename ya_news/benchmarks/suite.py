@@ -0,0 +1,151 @@
+"""
+Общая часть bench_requests: прогон сценариев, запись результатов
+в JSON и сравнение с сохранённым эталоном.
+
+Эталон зависит от машины, поэтому в репозиторий не попадает: первый
+запуск сохраняет его сам, а после осознанных изменений его
+перезаписывают флагом --update-baseline. Регрессия — падение
+пропускной способности или рост p50/p95 больше чем на --threshold
+(и больше чем на MIN_DIFFERENCE_MS, чтобы не ловить шум).
+
+Копия ya_note/benchmarks/suite.py: замеры запускаются из директории
+своего проекта (см. run_benchmarks.sh), и пакет benchmarks соседа
+оттуда не импортировать.
+"""
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import django
+
+from benchmarks.utils import percentile
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+RESULTS = BENCHMARKS_DIR / 'results.json'
+BASELINE = BENCHMARKS_DIR / 'baseline.json'
+DEFAULT_REQUESTS = 500
+DEFAULT_THRESHOLD = 0.2
+MIN_DIFFERENCE_MS = 0.5
+WARMUP = 20
+LATENCIES = (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99))
+# p99 на сотнях запросов слишком шумный, чтобы на нём падать.
+COMPARED_LATENCIES = ('p50_ms', 'p95_ms')
+
+
+def add_arguments(parser):
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS,
+                        help='Запросов на сценарий после прогрева.')
+    parser.add_argument('--output', type=Path, default=RESULTS)
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Допустимое ухудшение, доля от эталона.')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Записать результаты как новый эталон.')
+
+
+def request(method, path, status, data=None, before=None):
+    """
+    Сценарий: один запрос тестового клиента с проверкой статуса.
+
+    before, если задан, вызывается перед каждым запросом, например
+    чтобы сбросить кэш; его время входит в замер.
+    """
+    def send():
+        if before is not None:
+            before()
+        response = method(path) if data is None else method(path, data())
+        if response.status_code != status:
+            raise RuntimeError(
+                f'{path}: ответ {response.status_code}, ожидался {status}'
+            )
+    return send
+
+
+def measure(send, requests):
+    for _ in range(min(WARMUP, requests)):
+        send()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        sent = time.perf_counter()
+        send()
+        latencies.append(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - started
+    stats = {'requests': requests, 'rps': round(requests / elapsed, 1)}
+    for key, fraction in LATENCIES:
+        stats[key] = round(percentile(latencies, fraction) * 1000, 3)
+    return stats
+
+
+def run(scenarios, requests):
+    """Прогоняет сценарии по очереди и печатает таблицу."""
+    print(f'{"сценарий":>18} {"запр./с":>9} {"p50, мс":>9} '
+          f'{"p95, мс":>9} {"p99, мс":>9}')
+    results = {}
+    for name, send in scenarios:
+        stats = results[name] = measure(send, requests)
+        print(f'{name:>18} {stats["rps"]:>9.0f} {stats["p50_ms"]:>9.2f} '
+              f'{stats["p95_ms"]:>9.2f} {stats["p99_ms"]:>9.2f}')
+    return results
+
+
+def regressions(current, baseline, threshold):
+    problems = []
+    for name, stats in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if stats['rps'] < previous['rps'] * (1 - threshold):
+            problems.append(
+                f'{name}: {stats["rps"]:.0f} запр./с '
+                f'против {previous["rps"]:.0f} в эталоне'
+            )
+        for key in COMPARED_LATENCIES:
+            limit = max(
+                previous[key] * (1 + threshold),
+                previous[key] + MIN_DIFFERENCE_MS,
+            )
+            if stats[key] > limit:
+                problems.append(
+                    f'{name}: {key} {stats[key]:.2f} '
+                    f'против {previous[key]:.2f} в эталоне'
+                )
+    return problems
+
+
+def write(path, data):
+    path.write_text(
+        json.dumps(data, ensure_ascii=False, indent=2) + '\n',
+        encoding='utf-8',
+    )
+
+
+def finish(project, params, scenarios, args):
+    """Сохраняет результаты и сверяет их с эталоном; регрессия — код 1."""
+    results = {
+        'project': project,
+        'params': params,
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+        },
+        'scenarios': scenarios,
+    }
+    write(args.output, results)
+    if args.update_baseline or not args.baseline.exists():
+        write(args.baseline, results)
+        print(f'Эталон сохранён в {args.baseline}')
+        return
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    if baseline['params'] != params:
+        sys.exit(
+            f'Эталон {args.baseline} снят с другими параметрами '
+            f'({baseline["params"]}); перезапишите его с --update-baseline.'
+        )
+    problems = regressions(scenarios, baseline['scenarios'], args.threshold)
+    if problems:
+        sys.exit('Регрессии относительно эталона:\n' + '\n'.join(problems))
+    print(f'Регрессий относительно {args.baseline} нет.')
@@ -0,0 +1,56 @@
+import os
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+
+
+@contextmanager
+def test_database(name=None):
+    """
+    Временная база с применёнными миграциями, как у тестов.
+
+    Без name берётся TEST['NAME'] из настроек — файл test_db.sqlite3,
+    с которым работают и тесты: бенчмарк пересоздал бы его под
+    идущим прогоном. Поэтому бенчмарки передают в name путь во
+    временной директории.
+    """
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def fetched_bytes(queryset):
+    """Сколько байт данных вернула база на запрос queryset."""
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return sum(
+        len(value.encode()) if isinstance(value, str) else len(str(value))
+        for row in rows
+        for value in row
+        if value is not None
+    )
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку, без интерполяции."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from .conditions import (
+    comments_etag, comments_last_modified, news_list_etag, news_updated
+)
+from .models import Comment, News
+from .pagination import after_cursor, encode_cursor
+
+NEWS_FIELDS = ('id', 'title', 'summary', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+@require_GET
+@condition(etag_func=news_list_etag)
+def news_list(request):
+    """Последние новости без полного текста."""
+    news = News.objects.values(
+        *NEWS_FIELDS
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    return JsonResponse({'results': list(news)})
+
+
+@require_GET
+@condition(etag_func=comments_etag, last_modified_func=comments_last_modified)
+def news_comments(request, pk):
+    """Страница комментариев новости с курсором на следующую."""
+    # Отметку новости уже прочитали валидаторы условного GET.
+    if news_updated(request, pk) is None:
+        raise Http404
+    per_page = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    comments = list(after_cursor(
+        Comment.objects.filter(news_id=pk).values(*COMMENT_FIELDS),
+        request.GET.get('after'),
+    )[:per_page + 1])
+    next_cursor = None
+    if len(comments) > per_page:
+        comments = comments[:per_page]
+        next_cursor = encode_cursor(
+            comments[-1]['created'], comments[-1]['id']
+        )
+    return JsonResponse({
+        'results': [
+            {
+                'id': comment['id'],
+                'author': comment['author__username'],
+                'text': comment['text'],
+                'created': comment['created'],
+            }
+            for comment in comments
+        ],
+        'next': next_cursor,
+    })
@@ -0,0 +1,93 @@
+"""
+Асинхронные варианты страниц чтения для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, а синхронные представления под ASGI
+выполняются через sync_to_async(thread_sensitive=True), то есть по
+очереди в одном потоке. Здесь та же работа выполняется в отдельном
+ограниченном пуле потоков: запросы к базе идут параллельно, а число
+соединений с базой не превышает NEWS_ASYNC_DB_WORKERS.
+
+Включаются настройкой NEWS_ASYNC_VIEWS.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from yanews.instrumentation import watch_connections
+
+from . import views
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.NEWS_ASYNC_DB_WORKERS,
+                thread_name_prefix='news-db',
+            )
+        return _executor
+
+
+def render_view(view, request, *args, **kwargs):
+    """
+    Выполняет синхронное представление вместе с отрисовкой шаблона.
+
+    Ленивые queryset вычисляются при отрисовке, поэтому она тоже
+    должна пройти в потоке пула, а не в потоке событий.
+    """
+    close_old_connections()
+    # Запросы потока пула идут в Server-Timing и гистограммы запроса.
+    watch_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            started = perf_counter()
+            response.render()
+            timing = getattr(request, 'timing', None)
+            if timing is not None:
+                timing.render += (perf_counter() - started) * 1000
+        return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(view, request, *args, **kwargs):
+    """
+    Выполняет view в пуле с контекстом текущего запроса.
+
+    run_in_executor сам не переносит contextvars, а по ним, например,
+    роутер реплик узнаёт, что запрос закреплён за основной базой.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(
+        copy_context().run, render_view, view, request, *args, **kwargs
+    ))
+
+
+news_list_view = views.NewsList.as_view()
+news_detail_view = views.NewsDetail.as_view()
+news_comment_view = views.NewsComment.as_view()
+
+
+async def news_list(request, *args, **kwargs):
+    return await run_in_pool(news_list_view, request, *args, **kwargs)
+
+
+async def news_detail(request, *args, **kwargs):
+    """Чтение — в пуле; добавление комментария — как у обычных view."""
+    if request.method == 'POST':
+        return await sync_to_async(news_comment_view)(
+            request, *args, **kwargs
+        )
+    return await run_in_pool(news_detail_view, request, *args, **kwargs)
@@ -0,0 +1,72 @@
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+
+HOME_VERSION_KEY = 'news:home:version'
+COMMENTS_VERSION_KEY = 'news:{news_id}:comments:version'
+# Версии хранятся отдельно от фрагментов: фрагменты у каждого процесса
+# свои, а версии должны быть общими для всех воркеров, см. CACHES.
+VERSIONS_CACHE = 'versions'
+
+
+def versions():
+    return caches[VERSIONS_CACHE]
+
+
+def get_version(key):
+    """
+    Возвращает текущую версию закэшированных данных.
+
+    Если версии ещё нет (или её вытеснили из кэша), начинаем отсчёт
+    с текущего времени, чтобы не совпасть ни с одной прежней версией.
+    """
+    cache = versions()
+    version = cache.get(key)
+    if version is None:
+        version = time_ns()
+        cache.add(key, version, None)
+        # add файлового кэша не атомарен, и его может перезаписать
+        # другой процесс: берём то, что записалось на самом деле.
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """
+    Делает недействительными все фрагменты старой версии.
+
+    Новая версия — время сброса в наносекундах, но всегда больше
+    прежней: по версии видно, давно ли изменились данные, см. is_recent.
+    """
+    cache = versions()
+    version = max(cache.get(key, 0) + 1, time_ns())
+    cache.set(key, version, None)
+    return version
+
+
+def is_recent(version):
+    """
+    Сброшена ли версия так недавно, что реплики могли не догнать базу.
+
+    Версию сбрасывают сразу после записи в основную базу. Фрагмент,
+    заполненный в этот момент с отстающей реплики, сохранился бы под
+    новой версией со старыми данными до следующего сброса.
+    """
+    return time_ns() - version < settings.REPLICA_PIN_SECONDS * 10 ** 9
+
+
+def get_home_version():
+    return get_version(HOME_VERSION_KEY)
+
+
+def invalidate_home():
+    return bump_version(HOME_VERSION_KEY)
+
+
+def get_comments_version(news_id):
+    return get_version(COMMENTS_VERSION_KEY.format(news_id=news_id))
+
+
+def invalidate_comments(news_id):
+    return bump_version(COMMENTS_VERSION_KEY.format(news_id=news_id))
@@ -0,0 +1,117 @@
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import News
+from .pagination import normalize_cursor
+
+
+def stamp(moment):
+    return int(moment.timestamp() * 1_000_000)
+
+
+def news_list_etag(request, *args, **kwargs):
+    """
+    Версия списка новостей: id и отметки updated выведенных новостей.
+
+    Отметка меняется при правке новости и её комментариев, а новость,
+    удалённая со страницы, меняет сам набор строк. Запрос читает
+    NEWS_COUNT_ON_HOME_PAGE строк по индексу даты.
+
+    Last-Modified у списка нет: удаление новости не оставляет
+    отметки времени, и по If-Modified-Since страница ответила бы
+    304 после удаления.
+    """
+    rows = News.objects.values_list(
+        'id', 'updated'
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    digest = md5(
+        ';'.join(f'{pk}:{stamp(updated)}' for pk, updated in rows).encode()
+    ).hexdigest()
+    return f'news-{digest}'
+
+
+def news_updated(request, pk):
+    """
+    Отметка updated новости или None, если новости нет.
+
+    ETag и Last-Modified вычисляются по очереди, поэтому отметка
+    запоминается в запросе: на оба валидатора один запрос к базе.
+    """
+    cached = getattr(request, '_news_updated', None)
+    if cached is None or cached[0] != pk:
+        cached = request._news_updated = (pk, News.objects.filter(
+            pk=pk
+        ).values_list('updated', flat=True).first())
+    return cached[1]
+
+
+def comments_etag(request, pk, *args, **kwargs):
+    """Отметка новости и курсор страницы как ETag."""
+    updated = news_updated(request, pk)
+    if updated is None:
+        return None
+    cursor = normalize_cursor(request.GET.get('after')) or ''
+    return f'news-{pk}-{stamp(updated)}-{cursor}'
+
+
+def comments_last_modified(request, pk, *args, **kwargs):
+    """Последняя правка новости или её комментариев."""
+    return news_updated(request, pk)
+
+
+def user_etag(request):
+    """HTML-страницы различаются для пользователей: шапка и ссылки."""
+    return f'user-{request.user.pk or 0}'
+
+
+def home_page_etag(request, *args, **kwargs):
+    return f'{news_list_etag(request)}-{user_etag(request)}'
+
+
+def detail_page_etag(request, pk, *args, **kwargs):
+    """Новость с лентой комментариев и пользователь."""
+    etag = comments_etag(request, pk)
+    if etag is None:
+        return None
+    return f'{etag}-{user_etag(request)}'
+
+
+def edge_cache_headers(view):
+    """
+    Разрешает общим кэшам хранить страницы анонимных посетителей.
+
+    Авторизованные пользователи получают private-ответы, которые
+    браузер перепроверяет по ETag при каждом запросе.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, max_age=0)
+        else:
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.NEWS_PAGE_CACHE_MAX_AGE,
+            )
+        return response
+    return wrapper
+
+
+def conditional_page(etag_func, last_modified_func):
+    """ETag, Last-Modified и заголовки кэширования для HTML-страницы."""
+    def decorator(view):
+        return edge_cache_headers(condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view))
+    return decorator
+
+
+home_page_condition = conditional_page(home_page_etag, None)
+detail_page_condition = conditional_page(
+    detail_page_etag, comments_last_modified
+)
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+COMMENTS_CHANNEL = 'news:{news_id}:comments'
+
+
+class Subscription:
+    """
+    Очередь событий одного подписчика.
+
+    Пока событий нет, подписчик ждёт в цикле событий и не занимает
+    ни потока, ни соединения с базой.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, message):
+        """Медленный подписчик теряет самые старые события, а не память."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Простейший брокер событий в памяти одного процесса.
+
+    Публиковать можно из любого потока (например, из синхронного
+    представления), события доставляются в цикл событий подписчика.
+    Другой бэкенд (скажем, поверх Redis) должен реализовать те же
+    методы publish и subscribe и указываться в NEWS_EVENTS_BACKEND.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(
+            self, channel, settings.NEWS_EVENTS_QUEUE_SIZE
+        )
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            channel = self.subscriptions.get(subscription.channel, set())
+            channel.discard(subscription)
+            if not channel:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(
+                subscription.offer, message
+            )
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.NEWS_EVENTS_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    if setting == 'NEWS_EVENTS_BACKEND':
+        get_broker.cache_clear()
+
+
+def comments_channel(news_id):
+    return COMMENTS_CHANNEL.format(news_id=news_id)
+
+
+def publish_comment(comment):
+    """Отправляет новый комментарий подписчикам ленты новости."""
+    get_broker().publish(comments_channel(comment.news_id), {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    })
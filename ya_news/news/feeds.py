@@ -0,0 +1,107 @@
+import json
+import logging
+from datetime import date
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import iterparse
+
+from django.core.management.base import CommandError
+
+FORMATS = ('jsonl', 'rss')
+
+logger = logging.getLogger(__name__)
+
+
+def detect_format(path, fmt=None):
+    """Формат из параметра команды или из расширения файла."""
+    if fmt:
+        return fmt
+    return 'rss' if str(path).endswith(('.rss', '.xml')) else 'jsonl'
+
+
+def parse_jsonl(path):
+    """
+    Новости из JSON Lines.
+
+    Каждая строка — объект с полями id, title, text и необязательной
+    датой date в формате ISO. Строка, которая не разбирается или в
+    которой нет id и заголовка, — CommandError с её номером.
+    """
+    with open(path, encoding='utf-8') as feed:
+        for line_number, line in enumerate(feed, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                external_id = str(item['id'])
+                title = item['title']
+            except (ValueError, KeyError, TypeError) as error:
+                raise CommandError(
+                    f'Строка {line_number}: не разобрана новость ({error!r}).'
+                )
+            yield {
+                'external_id': external_id,
+                'title': title,
+                'text': item.get('text', ''),
+                'date': parse_iso_date(item.get('date'), external_id),
+            }
+
+
+def parse_iso_date(value, external_id):
+    """Дата в формате ISO; испорченную пропускаем, как и отсутствующую."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        logger.warning(
+            'Новость %s: не разобрана дата «%s», берём сегодняшнюю.',
+            external_id, value,
+        )
+        return None
+
+
+def parse_pub_date(published, external_id):
+    """Дата из <pubDate>; испорченную пропускаем, как и отсутствующую."""
+    if not published:
+        return None
+    try:
+        return parsedate_to_datetime(published).date()
+    except (TypeError, ValueError):
+        logger.warning(
+            'Новость %s: не разобрана дата «%s», берём сегодняшнюю.',
+            external_id, published,
+        )
+        return None
+
+
+def parse_rss(path):
+    """
+    Новости из RSS 2.0.
+
+    Файл разбирается потоково: обработанные <item> сразу удаляются
+    из родительского <channel>, поэтому память не растёт с размером
+    ленты.
+    """
+    parents = []
+    for event, element in iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag != 'item':
+            continue
+        external_id = element.findtext('guid') or element.findtext('link')
+        yield {
+            'external_id': external_id,
+            'title': element.findtext('title', ''),
+            'text': element.findtext('description', ''),
+            'date': parse_pub_date(element.findtext('pubDate'), external_id),
+        }
+        # clear() лишь опустошает элемент, а сам он остаётся в дереве.
+        parents[-1].remove(element)
+
+
+PARSERS = {
+    'jsonl': parse_jsonl,
+    'rss': parse_rss,
+}
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from news.cache import invalidate_home
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики комментариев новостей.'
+
+    def handle(self, *args, **options):
+        updated = News.objects.recount_comments()
+        # UPDATE идёт мимо сигналов: кэш главной сбрасываем сами.
+        if updated:
+            invalidate_home()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено новостей: {updated}')
+        )
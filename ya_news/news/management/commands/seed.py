@@ -0,0 +1,166 @@
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from news.cache import invalidate_home
+from news.models import Comment, News
+
+FIRST_NAMES = (
+    'Анна', 'Борис', 'Вера', 'Григорий', 'Дарья', 'Евгений', 'Жанна',
+    'Захар', 'Ирина', 'Кирилл', 'Любовь', 'Максим', 'Нина', 'Олег',
+    'Полина', 'Роман', 'Светлана', 'Тимур', 'Ульяна', 'Фёдор',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев',
+    'Козлов', 'Новиков', 'Морозов', 'Петров', 'Волков', 'Соловьёв',
+)
+SUBJECTS = (
+    'Мэрия', 'Учёные', 'Школьники', 'Синоптики', 'Депутаты', 'Врачи',
+    'Жители', 'Спортсмены', 'Археологи', 'Волонтёры', 'Энергетики',
+)
+ACTIONS = (
+    'открыли', 'обсудили', 'перенесли', 'запустили', 'нашли',
+    'отремонтировали', 'представили', 'поддержали', 'проверили',
+)
+OBJECTS = (
+    'новый парк', 'старый мост', 'ледовый каток', 'библиотеку',
+    'трамвайную линию', 'музей', 'стадион', 'набережную', 'ёлку',
+    'школьный двор', 'городской пруд', 'выставку',
+)
+WORDS = (
+    'город', 'сегодня', 'жители', 'власти', 'проект', 'работы', 'время',
+    'решение', 'район', 'вопрос', 'улица', 'весной', 'планируют',
+    'сообщили', 'завершить', 'бюджет', 'неделе', 'новости', 'погода',
+    'снег', 'дорога', 'праздник', 'история', 'дети', 'площадь',
+)
+SENTENCE_WORDS = (6, 14)
+SENTENCES = (3, 12)
+DAYS_BACK = 3650
+# Новости датируются назад от этого дня, а не от сегодняшнего: с тем же
+# --seed база получается той же в любой день. Другой день — --today.
+TODAY = date(2025, 1, 1)
+# Показатель закона Ципфа: немногие новости собирают большую часть
+# комментариев, у большинства их почти нет.
+COMMENTS_SKEW = 1.1
+
+
+def next_id(model):
+    """Первый свободный id: явные id нужны для внешних ключей пачек."""
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(start + batch_size, total)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями для нагрузочных проверок. Результат '
+        'определяется параметром --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--news', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--today', type=date.fromisoformat, default=TODAY,
+            help='Дата самой свежей новости, ГГГГ-ММ-ДД.',
+        )
+
+    def handle(self, *args, users, news, comments, seed, batch_size, today,
+               **options):
+        rnd = random.Random(seed)
+        started = monotonic()
+        user_ids = self.create_users(rnd, users, batch_size)
+        news_ids = self.create_news(rnd, news, batch_size, today)
+        if not user_ids or not news_ids:
+            comments = 0
+        self.create_comments(rnd, comments, news_ids, user_ids, batch_size)
+        # Счётчики пересчитываются одним UPDATE, а не по пачкам.
+        News.objects.filter(id__gte=news_ids.start).recount_comments()
+        invalidate_home()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, новостей: '
+            f'{len(news_ids)}, комментариев: {comments} '
+            f'за {monotonic() - started:.1f} с'
+        ))
+
+    def text(self, rnd):
+        sentences = []
+        for _ in range(rnd.randint(*SENTENCES)):
+            words = rnd.choices(WORDS, k=rnd.randint(*SENTENCE_WORDS))
+            sentences.append(' '.join(words).capitalize() + '.')
+        return ' '.join(sentences)
+
+    def create_users(self, rnd, total, batch_size):
+        User = get_user_model()
+        first_id = next_id(User)
+        for start, stop in batches(total, batch_size):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    User(
+                        id=first_id + index,
+                        username=(
+                            f'{rnd.choice(FIRST_NAMES)}_'
+                            f'{rnd.choice(LAST_NAMES)}_{first_id + index}'
+                        ),
+                        password=UNUSABLE_PASSWORD_PREFIX,
+                    )
+                    for index in range(start, stop)
+                )
+        return range(first_id, first_id + total)
+
+    def create_news(self, rnd, total, batch_size, today):
+        title_length = News._meta.get_field('title').max_length
+        first_id = next_id(News)
+        for start, stop in batches(total, batch_size):
+            batch = []
+            for index in range(start, stop):
+                text = self.text(rnd)
+                title = (
+                    f'{rnd.choice(SUBJECTS)} {rnd.choice(ACTIONS)} '
+                    f'{rnd.choice(OBJECTS)}'
+                )
+                batch.append(News(
+                    id=first_id + index,
+                    title=title[:title_length],
+                    text=text,
+                    summary=News.make_summary(text),
+                    date=today - timedelta(days=rnd.randrange(DAYS_BACK)),
+                ))
+            with transaction.atomic():
+                News.objects.bulk_create(batch)
+        return range(first_id, first_id + total)
+
+    def create_comments(self, rnd, total, news_ids, user_ids, batch_size):
+        # Популярность не зависит от id: новости перемешаны.
+        ranked = list(news_ids)
+        rnd.shuffle(ranked)
+        weights = list(accumulate(
+            1 / (rank + 1) ** COMMENTS_SKEW for rank in range(len(ranked))
+        ))
+        for start, stop in batches(total, batch_size):
+            targets = rnd.choices(ranked, cum_weights=weights, k=stop - start)
+            with transaction.atomic():
+                Comment.objects.bulk_create(
+                    Comment(
+                        news_id=news_id,
+                        author_id=rnd.choice(user_ids),
+                        text=' '.join(rnd.choices(
+                            WORDS, k=rnd.randint(*SENTENCE_WORDS)
+                        )).capitalize(),
+                    )
+                    for news_id in targets
+                )
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:15
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+SUMMARY_WORDS = 15
+BATCH_SIZE = 1000
+
+
+def fill_summary(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    batch = []
+    for news in News.objects.only('id', 'text').iterator(BATCH_SIZE):
+        news.summary = Truncator(news.text).words(SUMMARY_WORDS)
+        batch.append(news)
+        if len(batch) == BATCH_SIZE:
+            News.objects.bulk_update(batch, ('summary',))
+            batch = []
+    News.objects.bulk_update(batch, ('summary',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_bannedword'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='summary',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:20
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_external_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='date',
+            field=models.DateField(db_index=True, default=datetime.datetime.today),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:40
+
+from django.db import migrations
+
+# Индекс FTS5 без собственной копии текста (content=''): строки
+# берутся из news_news по rowid. Ё приводится к Е ещё при индексации,
+# регистр и диакритику снимает токенизатор unicode61.
+SEARCH_TABLE = 'news_news_fts'
+
+
+def normalized(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def index_row(row):
+    return (
+        f"INSERT INTO {SEARCH_TABLE}(rowid, title, text) VALUES "
+        f"({row}.id, {normalized(row + '.title')}, "
+        f"{normalized(row + '.text')});"
+    )
+
+
+def unindex_row(row):
+    return (
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text) "
+        f"VALUES ('delete', {row}.id, {normalized(row + '.title')}, "
+        f"{normalized(row + '.text')});"
+    )
+
+
+CREATE_INDEX = (
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    "title, text, content='', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON news_news "
+    f"BEGIN {index_row('new')} END",
+    f"CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON news_news "
+    f"BEGIN {unindex_row('old')} END",
+    # Пересчёт comment_count и прочие правки не трогают индекс.
+    f"CREATE TRIGGER {SEARCH_TABLE}_update "
+    "AFTER UPDATE OF title, text ON news_news "
+    f"BEGIN {unindex_row('old')} {index_row('new')} END",
+    f"INSERT INTO {SEARCH_TABLE}(rowid, title, text) "
+    f"SELECT id, {normalized('title')}, {normalized('text')} FROM news_news",
+)
+DROP_INDEX = (
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+)
+
+
+def run_on_sqlite(statements):
+    def operation(apps, schema_editor):
+        # На других СУБД поиск работает без индекса, см. news/search.py.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_news_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_INDEX), run_on_sqlite(DROP_INDEX)
+        ),
+    ]
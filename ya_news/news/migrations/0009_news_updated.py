@@ -0,0 +1,44 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:07
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search = import_module('news.migrations.0008_news_search')
+
+# На SQLite изменение столбцов пересоздаёт таблицу news_news, и вместе
+# со старой таблицей удаляются триггеры индекса поиска из 0008. Сам
+# индекс (content='') привязан к rowid и не страдает. Триггеры
+# создаются заново после AddField и — при откате — после RemoveField.
+CREATE_TRIGGERS = tuple(
+    statement.replace('CREATE TRIGGER', 'CREATE TRIGGER IF NOT EXISTS')
+    for statement in search.CREATE_INDEX
+    if statement.startswith('CREATE TRIGGER')
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_news_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop,
+            search.run_on_sqlite(CREATE_TRIGGERS),
+        ),
+        migrations.AlterModelOptions(
+            name='news',
+            options={'ordering': ('-date', '-id'), 'verbose_name': 'Новость', 'verbose_name_plural': 'Новости'},
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(
+            search.run_on_sqlite(CREATE_TRIGGERS),
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_news_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsSearchIndex',
+            fields=[
+                ('news', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='news.news')),
+                ('match', models.TextField(db_column='news_news_fts')),
+            ],
+            options={
+                'db_table': 'news_news_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -2,21 +2,140 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.text import Truncator
+
+SUMMARY_WORDS = 15
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def shift_comment_count(self, delta):
+        """
+        Атомарно изменяет счётчик комментариев на delta.
+
+        Тем же UPDATE обновляется отметка updated. Счётчик не
+        опускается ниже нуля: расхождения с реальными данными
+        исправляет команда recount_comments.
+        """
+        return self.update(
+            comment_count=Greatest(F('comment_count') + delta, 0),
+            updated=timezone.now(),
+        )
+
+    def recount_comments(self):
+        """
+        Пересчитывает счётчики комментариев одним UPDATE.
+
+        Меняются только расходящиеся счётчики, и у этих новостей
+        обновляется отметка updated.
+        """
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            count=Count('pk')
+        ).values('count')
+        actual = Coalesce(Subquery(counts), 0)
+        return self.exclude(comment_count=actual).update(
+            comment_count=actual, updated=timezone.now()
+        )
+
+    def touch(self):
+        """Отмечает изменение новости или её комментариев."""
+        return self.update(updated=timezone.now())
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
-    date = models.DateField(default=datetime.today)
+    date = models.DateField(default=datetime.today, db_index=True)
+    summary = models.TextField(blank=True, editable=False)
+    external_id = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+    )
+    # Меняется при правке новости и её комментариев, из неё строятся
+    # ETag и Last-Modified страниц, см. news/conditions.py.
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-date',)
+        # id разводит новости одного дня: порядок не зависит от плана
+        # запроса, и ETag списка совпадает с выведенной страницей.
+        ordering = ('-date', '-id')
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def make_summary(text):
+        """Анонс для списков: первые слова текста новости."""
+        return Truncator(text).words(SUMMARY_WORDS)
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет новость, пересчитывая анонс по тексту.
+
+        Анонс пересчитывается, только если текст загружен и сохраняется,
+        и тогда сохраняется вместе с ним. QuerySet.update(), bulk_create
+        и bulk_update save() не вызывают: меняя ими текст, анонс
+        заполняют сами через make_summary, см. ingest_news и seed.
+        """
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        if update_fields is None and deferred and not self._state.adding:
+            # Как и Django, у частично загруженной новости сохраняем
+            # только загруженные поля.
+            update_fields = {
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            }
+        if 'text' not in deferred and (
+            update_fields is None or 'text' in update_fields
+        ):
+            self.summary = self.make_summary(self.text)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'summary'}
+        if update_fields is not None:
+            # auto_now записывается, только если поле среди сохраняемых.
+            kwargs['update_fields'] = {*update_fields, 'updated'}
+        super().save(*args, **kwargs)
+
+
+class NewsSearchIndex(models.Model):
+    """
+    Индекс FTS5 по новостям из миграции 0008_news_search.
+
+    Таблицу создают миграции и заполняют триггеры; модель нужна только
+    поиску (см. news/search.py), чтобы соединять её с новостями
+    средствами ORM. rowid индекса — id новости, а скрытый столбец
+    с именем таблицы принимает выражение MATCH.
+    """
+    news = models.OneToOneField(
+        News,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    match = models.TextField(db_column='news_news_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'news_news_fts'
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -31,7 +150,25 @@ class Comment(models.Model):
     created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = [
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_thread_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:50]
+
+
+class BannedWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
@@ -0,0 +1,165 @@
+import re
+import threading
+from pathlib import Path
+from time import monotonic
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .cache import bump_version, get_version
+
+MODERATION_SETTINGS = (
+    'BAD_WORDS',
+    'BAD_WORDS_FILE',
+    'BAD_WORDS_WHOLE_WORDS',
+    'BAD_WORDS_CHECK_INTERVAL',
+)
+MODERATION_VERSION_KEY = 'news:moderation:version'
+
+
+def normalize(text):
+    """Приводит текст к единому виду: регистр и «ё» не учитываются."""
+    return text.casefold().replace('ё', 'е')
+
+
+def _node_pattern(node):
+    """Рекурсивно превращает узел префиксного дерева в регулярку."""
+    alternatives = [
+        re.escape(char) + _node_pattern(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1:
+        pattern = alternatives[0]
+        if '' in node:
+            return f'(?:{pattern})?'
+        return pattern
+    pattern = '(?:{})'.format('|'.join(alternatives))
+    return pattern + '?' if '' in node else pattern
+
+
+def build_pattern(words):
+    """
+    Собирает одну регулярку по префиксному дереву слов.
+
+    Общие префиксы объединяются, поэтому в каждой позиции текста
+    проверяется не больше ветвей, чем букв в алфавите, а время поиска
+    растёт линейно с длиной текста и почти не зависит от размера словаря.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+class BadWordsMatcher:
+    """Скомпилированный поиск запрещённых слов в тексте."""
+
+    def __init__(self, words, whole_words=False):
+        self.words = frozenset(
+            normalize(word.strip()) for word in words if word.strip()
+        )
+        self.whole_words = whole_words
+        self.regex = None
+        if self.words:
+            pattern = build_pattern(self.words)
+            if whole_words:
+                pattern = rf'(?<!\w){pattern}(?!\w)'
+            self.regex = re.compile(pattern)
+
+    def search(self, text):
+        """Возвращает первое найденное запрещённое слово или None."""
+        if self.regex is None:
+            return None
+        match = self.regex.search(normalize(text))
+        return match.group() if match else None
+
+
+def read_words_file(path):
+    """Читает словарь: одно слово на строку, строки с # пропускаются."""
+    with Path(path).open(encoding='utf-8') as words_file:
+        return [
+            line.strip() for line in words_file
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+
+
+def load_words():
+    from .forms import BAD_WORDS
+    from .models import BannedWord
+
+    words = list(getattr(settings, 'BAD_WORDS', BAD_WORDS))
+    words_file = getattr(settings, 'BAD_WORDS_FILE', None)
+    if words_file:
+        words.extend(read_words_file(words_file))
+    words.extend(BannedWord.objects.values_list('word', flat=True))
+    return words
+
+
+class MatcherCache:
+    """
+    Матчер, общий для всех запросов одного процесса.
+
+    Словарь хранится в базе, а в общем для всех воркеров кэше версий
+    (алиас versions, см. news/cache.py) лежит только его версия.
+    Процесс сверяет версию не чаще раза в BAD_WORDS_CHECK_INTERVAL
+    секунд и перечитывает словарь из базы, лишь когда версия
+    изменилась: правка в админке доходит до всех воркеров за несколько
+    секунд без запросов к базе на каждый комментарий.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.matcher = None
+        self.version = None
+        self.checked_at = None
+
+    def get(self):
+        now = monotonic()
+        interval = getattr(settings, 'BAD_WORDS_CHECK_INTERVAL', 5)
+        matcher = self.matcher
+        if (
+            matcher is not None
+            and self.checked_at is not None
+            and now - self.checked_at < interval
+        ):
+            return matcher
+        version = get_version(MODERATION_VERSION_KEY)
+        with self.lock:
+            if self.matcher is None or self.version != version:
+                self.matcher = BadWordsMatcher(
+                    load_words(),
+                    whole_words=getattr(
+                        settings, 'BAD_WORDS_WHOLE_WORDS', False
+                    ),
+                )
+                self.version = version
+            self.checked_at = now
+            return self.matcher
+
+
+matcher_cache = MatcherCache()
+
+
+def get_matcher():
+    return matcher_cache.get()
+
+
+def invalidate_matcher():
+    """Сообщает всем процессам, что словарь изменился."""
+    return bump_version(MODERATION_VERSION_KEY)
+
+
+@receiver(setting_changed)
+def reset_matcher(setting, **kwargs):
+    if setting in MODERATION_SETTINGS:
+        matcher_cache.reset()
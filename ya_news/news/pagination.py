@@ -0,0 +1,87 @@
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_SEPARATOR = '|'
+# Больший id SQLite не примет: OverflowError вместо пустой страницы.
+MAX_ID = 2 ** 63 - 1
+
+CommentsPage = namedtuple('CommentsPage', ('comments', 'next_cursor'))
+
+
+def encode_cursor(created, pk):
+    """Кодирует позицию комментария (created, id) в строку для URL."""
+    value = f'{created.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return urlsafe_base64_encode(value.encode())
+
+
+def decode_cursor(cursor):
+    """
+    Раскодирует курсор в пару (created, id).
+
+    Для пустого или испорченного курсора возвращает None,
+    то есть начало ленты комментариев.
+    """
+    if not cursor:
+        return None
+    try:
+        created, pk = force_str(
+            urlsafe_base64_decode(cursor)
+        ).split(CURSOR_SEPARATOR)
+        created, pk = datetime.fromisoformat(created), int(pk)
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= pk <= MAX_ID:
+        return None
+    return created, pk
+
+
+def normalize_cursor(cursor):
+    """
+    Единая запись курсора для ключей кэша и ETag.
+
+    Курсоры одной позиции (другое смещение часового пояса, лишнее
+    выравнивание base64) дают одну строку, испорченные — None.
+    """
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    created, pk = position
+    if timezone.is_aware(created):
+        created = created.astimezone(dt_timezone.utc)
+    return encode_cursor(created, pk)
+
+
+def after_cursor(comments, cursor):
+    """Оставляет в queryset только комментарии после курсора."""
+    position = decode_cursor(cursor)
+    if position is None:
+        return comments
+    created, pk = position
+    return comments.filter(
+        Q(created__gt=created) | Q(created=created, pk__gt=pk)
+    )
+
+
+def get_comments_page(news, cursor=None, per_page=None):
+    """
+    Возвращает страницу комментариев новости после курсора.
+
+    Используется keyset-пагинация по (created, id): глубина страницы
+    не влияет на стоимость запроса, в отличие от OFFSET.
+    """
+    if per_page is None:
+        per_page = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    comments = list(after_cursor(
+        news.comment_set.select_related('author'), cursor
+    )[:per_page + 1])
+    next_cursor = None
+    if len(comments) > per_page:
+        comments = comments[:per_page]
+        next_cursor = encode_cursor(comments[-1].created, comments[-1].pk)
+    return CommentsPage(comments, next_cursor)
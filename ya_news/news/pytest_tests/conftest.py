@@ -1,15 +1,69 @@
+import os
+import subprocess
+import sys
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from django.test import Client
 
 import pytest
 
+from news.cache import VERSIONS_CACHE
 from news.models import Comment, News
+from news.moderation import matcher_cache
+from yanews.instrumentation import registry
 
 
 User = get_user_model()
 
 
+# Читает ключ из общего кэша версий в отдельном процессе: так ведёт
+# себя другой воркер сервера.
+READ_VERSION = '''
+import sys
+import django
+from django.conf import settings
+django.setup()
+settings.CACHES['versions']['LOCATION'] = sys.argv[1]
+from django.core.cache import caches
+print(caches['versions'].get(sys.argv[2]))
+'''
+
+
+@pytest.fixture(autouse=True)
+def versions_cache(settings, tmp_path):
+    """Свой каталог общего кэша версий у каждого теста."""
+    settings.CACHES = {
+        **settings.CACHES,
+        VERSIONS_CACHE: {
+            **settings.CACHES[VERSIONS_CACHE],
+            'LOCATION': str(tmp_path / 'versions'),
+        },
+    }
+    return settings.CACHES[VERSIONS_CACHE]['LOCATION']
+
+
+@pytest.fixture
+def version_in_other_process(settings, versions_cache):
+    def read(key):
+        result = subprocess.run(
+            [sys.executable, '-c', READ_VERSION, versions_cache, key],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'yanews.settings'},
+        )
+        return int(result.stdout)
+    return read
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(versions_cache):
+    cache.clear()
+    matcher_cache.reset()
+    registry.reset()
+
+
 @pytest.fixture
 def test_news():
     return News.objects.create(title='Заголовок', text='Текст')
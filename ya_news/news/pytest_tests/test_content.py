@@ -1,12 +1,27 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connections
+from django.test import AsyncRequestFactory
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.text import Truncator
 
 import pytest
 
-from datetime import datetime, timedelta
-from news.models import Comment, News
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http import HTTPStatus
+from news import async_views
+from news.cache import HOME_VERSION_KEY, get_home_version, invalidate_home
+from news.events import publish_comment
+from news.models import SUMMARY_WORDS, Comment, News
+from news.pagination import encode_cursor
+from news.sse import EventStreamRouter
+from yanews.instrumentation import InstrumentationMiddleware
 
 
 User = get_user_model()
@@ -77,6 +92,24 @@ def test_comments_order(client, create_test_detail_page):
     assert all_comments[0].created < all_comments[1].created
 
 
+@pytest.fixture
+def commented_news(test_news):
+    for index in range(5):
+        Comment.objects.create(
+            news=test_news, text=f'Комментарий {index}',
+            author=User.objects.create(username=f'Читатель {index}'),
+        )
+    return test_news
+
+
+# Дата новости с последним комментарием, новость, страница комментариев
+# вместе с авторами.
+@pytest.mark.query_budget(3)
+@pytest.mark.django_db
+def test_detail_page_has_no_n_plus_one(client, commented_news):
+    client.get(reverse('news:detail', args=(commented_news.id,)))
+
+
 @pytest.mark.django_db
 def test_anonymous_client_has_no_form(client, create_test_detail_page):
     detail_url, _ = create_test_detail_page
@@ -90,3 +123,420 @@ def test_authorized_client_has_form(client, create_test_detail_page):
     client.force_login(author)
     response = client.get(detail_url)
     assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_home_comment_count_without_join(
+        client, create_test_news, django_assert_max_num_queries
+):
+    create_test_news()
+    news = News.objects.first()
+    author = User.objects.create(username='Комментатор')
+    comments_count = 50
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(comments_count)
+    )
+    News.objects.recount_comments()
+    home_url = reverse('news:home')
+    # Валидаторы условного GET и сам список новостей.
+    with django_assert_max_num_queries(2) as captured:
+        response = client.get(home_url)
+    sql = captured.captured_queries[-1]['sql']
+    assert 'news_comment' not in sql
+    assert '"news_news"."text"' not in sql
+    assert 'LIMIT' in sql
+    object_list = response.context['object_list']
+    assert object_list[0].comment_count == comments_count
+    assert f'Комментариев: {comments_count}' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comments_keyset_pagination(
+        client, settings, create_test_detail_page,
+        django_assert_max_num_queries
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    detail_url, author = create_test_detail_page
+    news = News.objects.get()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Ещё текст {index}')
+        for index in range(3)
+    )
+    expected = list(news.comment_set.values_list('pk', flat=True))
+    seen = []
+    response = client.get(detail_url)
+    while True:
+        page = response.context['comments_page']
+        seen.extend(comment.pk for comment in page.comments)
+        next_cursor = page.next_cursor
+        if next_cursor is None:
+            break
+        # Валидаторы условного GET, новость и страница комментариев.
+        with django_assert_max_num_queries(3):
+            response = client.get(detail_url, {'after': next_cursor})
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_out_of_range_cursor_is_ignored(client, create_test_detail_page):
+    detail_url, _ = create_test_detail_page
+    news = News.objects.get()
+    created = news.comment_set.first().created
+    for pk in (10 ** 30, -1):
+        response = client.get(
+            detail_url, {'after': encode_cursor(created, pk)}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.context['comments_page'].comments) == 2
+
+
+@pytest.mark.django_db
+def test_junk_cursors_share_first_page_fragment(
+        client, create_test_detail_page
+):
+    detail_url, _ = create_test_detail_page
+    client.get(detail_url)
+    keys = set(cache._cache)
+    for junk in ('1', 'мусор', 'MTIz', 'x' * 50, encode_cursor(
+            timezone.now(), 10 ** 30
+    )):
+        response = client.get(detail_url, {'after': junk})
+        assert 'К началу обсуждения' not in response.content.decode()
+    assert set(cache._cache) == keys
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'fragments'),
+        },
+    }
+    settings.CACHES = {**settings.CACHES, 'default': backends[request.param]}
+
+
+@pytest.mark.django_db
+def test_home_page_cache_invalidation(
+        client, cache_backend, create_test_news,
+        django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    create_test_news()
+    home_url = reverse('news:home')
+    client.get(home_url)
+    # Из базы читаются только валидаторы условного GET.
+    with django_assert_num_queries(1):
+        client.get(home_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Свежая новость', text='Просто текст.')
+    response = client.get(home_url)
+    assert 'Свежая новость' in response.content.decode()
+
+
+def test_home_version_is_shared_between_processes(version_in_other_process):
+    before = get_home_version()
+    assert version_in_other_process(HOME_VERSION_KEY) == before
+    invalidate_home()
+    after = version_in_other_process(HOME_VERSION_KEY)
+    assert after != before
+    assert after == get_home_version()
+
+
+def backdate_news():
+    """Отметки updated в прошлом: Last-Modified точен только до секунды."""
+    News.objects.update(updated=timezone.now() - timedelta(hours=1))
+
+
+@pytest.mark.django_db
+def test_detail_validators_follow_comment_changes(
+        client, author_client, comment, edit_url, delete_url,
+        form_data, updated_form_data
+):
+    url = reverse('news:detail', args=(comment.news_id,))
+    for change in (
+        lambda: author_client.post(url, data=form_data),
+        lambda: author_client.post(edit_url, data=updated_form_data),
+        lambda: author_client.post(delete_url),
+    ):
+        backdate_news()
+        response = client.get(url)
+        etag, modified = response['ETag'], response['Last-Modified']
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        change()
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified
+        ).status_code == HTTPStatus.OK
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_home_etag_follows_deleted_news(client, create_test_news):
+    create_test_news()
+    url = reverse('news:home')
+    etag = client.get(url)['ETag']
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    News.objects.first().delete()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    )
+
+
+@pytest.mark.django_db
+def test_news_summary_is_filled_on_save(client):
+    text = ' '.join(f'слово{index}' for index in range(30))
+    news = News.objects.create(title='Длинная новость', text=text)
+    assert news.summary == Truncator(text).words(SUMMARY_WORDS)
+    response = client.get(reverse('news:home'))
+    assert news.summary in response.content.decode()
+    assert text not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_news_summary_follows_saved_text(test_news, django_assert_num_queries):
+    summary = test_news.summary
+    news = News.objects.only('id', 'title').get()
+    news.title = 'Новый заголовок'
+    # Текст не загружен: анонс не трогаем и текст не дочитываем.
+    with django_assert_num_queries(1):
+        news.save()
+    test_news.refresh_from_db()
+    assert (test_news.title, test_news.summary) == ('Новый заголовок', summary)
+    test_news.text = 'Правка текста'
+    test_news.save(update_fields=('text',))
+    test_news.refresh_from_db()
+    assert test_news.summary == 'Правка текста'
+    news = News.objects.only('id', 'text').get()
+    news.text = 'Правка частично загруженной новости'
+    news.save()
+    news.refresh_from_db()
+    assert news.summary == 'Правка частично загруженной новости'
+
+
+@pytest.mark.django_db
+def test_api_news_list_conditional_get(client, create_test_news):
+    create_test_news()
+    url = reverse('news:api_list')
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert len(results) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert 'text' not in results[0]
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_api_comments_pages_and_etag(
+        client, settings, create_test_detail_page,
+        django_capture_on_commit_callbacks
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    _, author = create_test_detail_page
+    news = News.objects.get()
+    url = reverse('news:api_comments', args=(news.id,))
+    response = client.get(url)
+    data = response.json()
+    assert len(data['results']) == 1
+    assert data['results'][0]['author'] == author.username
+    second_page = client.get(url, {'after': data['next']}).json()
+    assert second_page['results'][0]['id'] != data['results'][0]['id']
+    etag = response['ETag']
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    with django_capture_on_commit_callbacks(execute=True):
+        # Как в NewsComment.form_valid: отметку updated новости
+        # обновляет сдвиг счётчика.
+        Comment.objects.create(news=news, author=author, text='Новый')
+        News.objects.filter(pk=news.pk).shift_comment_count(1)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    )
+
+
+@pytest.mark.django_db
+def test_api_comments_last_modified_follows_changes(
+        client, author_client, comment, edit_url, delete_url,
+        updated_form_data
+):
+    url = reverse('news:api_comments', args=(comment.news_id,))
+    for change in (
+        lambda: author_client.post(edit_url, data=updated_form_data),
+        lambda: author_client.post(delete_url),
+    ):
+        backdate_news()
+        modified = client.get(url)['Last-Modified']
+        change()
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified
+        ).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_api_comments_etag_ignores_cursor_spelling(client, comment):
+    url = reverse('news:api_comments', args=(comment.news_id,))
+    moscow = dt_timezone(timedelta(hours=3))
+    utc_cursor = encode_cursor(comment.created, comment.pk)
+    local_cursor = encode_cursor(
+        comment.created.astimezone(moscow), comment.pk
+    )
+    assert utc_cursor != local_cursor
+    etags = {
+        client.get(url, {'after': cursor})['ETag']
+        for cursor in (utc_cursor, local_cursor)
+    }
+    assert len(etags) == 1
+    assert client.get(url, {'after': 'мусор'})['ETag'] == (
+        client.get(url)['ETag']
+    )
+
+
+@pytest.fixture
+def db_pool(settings):
+    """
+    Пул потоков асинхронных страниц из одного потока на время теста.
+
+    Соединение с базой остаётся открытым в потоке пула: его закрываем,
+    иначе файл тестовой базы удалят при открытом соединении.
+    """
+    settings.NEWS_ASYNC_DB_WORKERS = 1
+    async_views._executor = None
+    executor = async_views.get_executor()
+    yield executor
+    executor.submit(connections.close_all).result()
+    executor.shutdown()
+    async_views._executor = None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_render_in_pool(create_test_detail_page, db_pool):
+    detail_url, _ = create_test_detail_page
+    news = News.objects.get()
+    factory = AsyncRequestFactory()
+    pages = (
+        (async_views.news_list, reverse('news:home'), {}),
+        (async_views.news_detail, detail_url, {'pk': news.pk}),
+    )
+    for view, url, kwargs in pages:
+        request = factory.get(url)
+        request.user = AnonymousUser()
+        response = async_to_sync(view)(request, **kwargs)
+        assert response.status_code == HTTPStatus.OK
+        assert news.title in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_pool_queries_are_timed(create_test_detail_page, db_pool):
+    detail_url, _ = create_test_detail_page
+    news = News.objects.get()
+
+    async def view(request):
+        return await async_views.news_detail(request, pk=news.pk)
+
+    request = AsyncRequestFactory().get(detail_url)
+    request.user = AnonymousUser()
+    response = async_to_sync(InstrumentationMiddleware(view))(request)
+    assert response.status_code == HTTPStatus.OK
+    # Запросы и отрисовка прошли в потоке пула, а не в потоке теста.
+    assert request.timing.queries > 0
+    assert request.timing.render > 0
+    assert f'desc="{request.timing.queries} queries"' in (
+        response['Server-Timing']
+    )
+
+
+async def not_django(scope, receive, send):
+    raise AssertionError('SSE-адрес не должен доходить до Django')
+
+
+def stream_events(path, on_chunk):
+    """Прогоняет GET-запрос через EventStreamRouter, собирая сообщения."""
+    sent = []
+
+    async def scenario():
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if on_chunk(message.get('body', b'')):
+                disconnected.set()
+
+        router = EventStreamRouter(not_django)
+        await router(
+            {'type': 'http', 'method': 'GET', 'path': path},
+            receive, send,
+        )
+
+    async_to_sync(scenario)()
+    return sent
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_events_stream(test_news, comment):
+    def on_chunk(body):
+        if body.startswith(b'retry:'):
+            # Подписка оформлена — публикуем комментарий.
+            publish_comment(comment)
+        return body.startswith(b'event: comment')
+
+    sent = stream_events(f'/news/{test_news.pk}/events/', on_chunk)
+    assert sent[0]['status'] == HTTPStatus.OK
+    assert (
+        b'content-type', b'text/event-stream; charset=utf-8'
+    ) in sent[0]['headers']
+    body = sent[-1]['body'].decode()
+    assert comment.text in body
+    assert f'"id": {comment.pk}' in body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_events_unknown_news():
+    sent = stream_events('/news/404/events/', lambda body: True)
+    assert sent[0]['status'] == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_follows_edits(client, settings):
+    settings.NEWS_SEARCH_RESULTS_PER_PAGE = 2
+    in_text = News.objects.create(title='Погода', text='Ёлки в снегу')
+    in_title = News.objects.create(title='Новогодняя ёлка', text='Праздник')
+    News.objects.create(title='Спорт', text='Хоккей')
+    url = reverse('news:search')
+    # Без различия Е и Ё, с другим окончанием, заголовок важнее текста.
+    response = client.get(url, {'q': 'ЕЛКИ'})
+    assert list(response.context['object_list']) == [in_title, in_text]
+    in_text.title, in_text.text = 'Погода', 'Дождь'
+    in_text.save()
+    in_title.delete()
+    response = client.get(url, {'q': 'елки'})
+    assert not response.context['object_list']
+    assert not client.get(url).context['object_list']
+
+
+@pytest.mark.django_db
+def test_search_is_paginated(client, settings):
+    settings.NEWS_SEARCH_RESULTS_PER_PAGE = 2
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст')
+        for index in range(3)
+    )
+    url = reverse('news:search')
+    first = client.get(url, {'q': 'новости'}).context
+    second = client.get(url, {'q': 'новости', 'page': 2}).context
+    assert first['paginator'].count == 3
+    assert len(first['object_list']) == 2
+    assert len(second['object_list']) == 1
@@ -1,10 +1,34 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from io import StringIO
+from xml.etree.ElementTree import iterparse
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.urls import reverse
 
 import pytest
 from http import HTTPStatus
 
-from news.models import Comment
+from news import feeds
+from news.cache import invalidate_home
+from news.management.commands.seed import DAYS_BACK
+from news.models import BannedWord, Comment, News
 from news.forms import BAD_WORDS, WARNING
+from news.moderation import (
+    MODERATION_VERSION_KEY, BadWordsMatcher, get_matcher
+)
+from yanews.query_budget import QueryRecorder
+from yanews.replicas import PIN_COOKIE, ReplicaPinMiddleware
+
+# Сессия и пользователь загружаются при каждом запросе авторизованного
+# клиента.
+AUTH_QUERIES = 2
+# SAVEPOINT и RELEASE SAVEPOINT вокруг записи в транзакции.
+ATOMIC_QUERIES = 2
 
 
 @pytest.mark.django_db
@@ -49,3 +73,388 @@ def test_user_cant_delete_comment_of_another_user(reader_client,
     response = reader_client.delete(delete_url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_create_and_delete(test_news, author_client,
+                                                 form_data):
+    url = reverse('news:detail', args=(test_news.id,))
+    author_client.post(url, data=form_data)
+    test_news.refresh_from_db()
+    assert test_news.comment_count == 1
+    comment = Comment.objects.get()
+    author_client.post(reverse('news:delete', args=(comment.id,)))
+    test_news.refresh_from_db()
+    assert test_news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(client, comment, test_news):
+    News.objects.update(comment_count=100)
+    home_url = reverse('news:home')
+    assert 'Комментариев: 100' in client.get(home_url).content.decode()
+    call_command('recount_comments', stdout=StringIO())
+    test_news.refresh_from_db()
+    assert test_news.comment_count == 1
+    content = client.get(home_url).content.decode()
+    assert 'Комментариев: 1\n' in content
+    assert 'Комментариев: 100' not in content
+
+
+@pytest.mark.django_db
+def test_comment_thread_cache_follows_edits(
+        client, author_client, reader_client, comment, edit_url,
+        updated_form_data, django_assert_num_queries,
+        django_capture_on_commit_callbacks
+):
+    detail_url = reverse('news:detail', args=(comment.news_id,))
+    client.get(detail_url)
+    # Валидаторы условного GET и сама новость.
+    with django_assert_num_queries(2):
+        client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(edit_url, data=updated_form_data)
+    assert updated_form_data['text'] in client.get(
+        detail_url
+    ).content.decode()
+    assert edit_url in author_client.get(detail_url).content.decode()
+    assert edit_url not in reader_client.get(detail_url).content.decode()
+
+
+@pytest.fixture
+def loaded_matcher(db):
+    """Словарь модерации уже загружен процессом."""
+    return get_matcher()
+
+
+@pytest.mark.django_db
+def test_create_comment_queries(test_news, author_client, form_data,
+                                loaded_matcher, django_assert_num_queries):
+    url = reverse('news:detail', args=(test_news.id,))
+    # Новость, вставка комментария, счётчик вместе с отметкой updated.
+    with django_assert_num_queries(AUTH_QUERIES + ATOMIC_QUERIES + 3):
+        author_client.post(url, data=form_data)
+
+
+@pytest.mark.django_db
+def test_edit_comment_queries(author_client, edit_url, updated_form_data,
+                              loaded_matcher, django_assert_num_queries):
+    # Комментарий вместе с новостью, обновление текста, отметка updated.
+    with django_assert_num_queries(AUTH_QUERIES + 3):
+        author_client.post(edit_url, data=updated_form_data)
+
+
+@pytest.mark.django_db
+def test_delete_comment_queries(author_client, delete_url,
+                                django_assert_num_queries):
+    # Комментарий, удаление, отметка updated и счётчик новости.
+    with django_assert_num_queries(AUTH_QUERIES + ATOMIC_QUERIES + 4):
+        author_client.post(delete_url)
+
+
+@pytest.mark.parametrize(
+    'text, whole_words, is_bad',
+    (
+        ('Ты РЕДИСКА!', False, True),
+        ('Вот негодяйка', False, True),
+        ('Вот негодяйка', True, False),
+        ('Какой негодяй.', True, True),
+        ('Просто текст', False, False),
+    )
+)
+def test_bad_words_matcher(text, whole_words, is_bad):
+    matcher = BadWordsMatcher(BAD_WORDS, whole_words=whole_words)
+    assert (matcher.search(text) is not None) == is_bad
+
+
+def test_bad_words_matcher_folds_yo():
+    matcher = BadWordsMatcher(('ёжик',))
+    assert matcher.search('ЕЖИК в тумане') == 'ежик'
+
+
+@pytest.mark.django_db
+def test_bad_words_file_setting(settings, tmp_path, test_news, auth_client):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# Словарь модерации\nбяка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    url = reverse('news:detail', args=(test_news.id,))
+    response = auth_client.post(url, data={'text': 'Сам ты Бяка'})
+    assert response.context['form'].errors['text'] == [WARNING]
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_banned_words_from_database(
+        settings, test_news, auth_client, django_assert_num_queries,
+        django_capture_on_commit_callbacks
+):
+    settings.BAD_WORDS_CHECK_INTERVAL = 0
+    get_matcher()
+    with django_assert_num_queries(0):
+        get_matcher()
+    with django_capture_on_commit_callbacks(execute=True):
+        BannedWord.objects.create(word='Бяка')
+    url = reverse('news:detail', args=(test_news.id,))
+    response = auth_client.post(url, data={'text': 'Сам ты бяка'})
+    assert response.context['form'].errors['text'] == [WARNING]
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_banned_words_version_reaches_other_workers(
+        version_in_other_process, django_capture_on_commit_callbacks
+):
+    get_matcher()
+    before = version_in_other_process(MODERATION_VERSION_KEY)
+    with django_capture_on_commit_callbacks(execute=True):
+        BannedWord.objects.create(word='Бяка')
+    assert version_in_other_process(MODERATION_VERSION_KEY) != before
+
+
+RSS_FEED = '''<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel>
+  <item>
+    <guid>rss-1</guid>
+    <title>Новость из RSS</title>
+    <description>Текст новости из RSS</description>
+    <pubDate>Mon, 02 Jan 2023 10:00:00 +0300</pubDate>
+  </item>
+</channel></rss>
+'''
+
+
+@pytest.mark.django_db
+def test_ingest_news_is_idempotent(
+        tmp_path, django_capture_on_commit_callbacks
+):
+    feed = tmp_path / 'feed.jsonl'
+    feed.write_text(''.join(
+        json.dumps({'id': index, 'title': f'Новость {index}', 'text': 'Т'},
+                   ensure_ascii=False) + '\n'
+        for index in range(3)
+    ), encoding='utf-8')
+    with django_capture_on_commit_callbacks() as callbacks:
+        call_command('ingest_news', str(feed), '--batch-size', '2',
+                     stdout=StringIO())
+    # Кэш главной сбрасывается один раз на пачку.
+    assert len(callbacks) == 2
+    assert News.objects.count() == 3
+    feed.write_text(
+        json.dumps({'id': 0, 'title': 'Исправлено', 'text': 'Т'},
+                   ensure_ascii=False) + '\n',
+        encoding='utf-8',
+    )
+    call_command('ingest_news', str(feed), stdout=StringIO())
+    assert News.objects.count() == 3
+    assert News.objects.get(external_id='0').title == 'Исправлено'
+
+
+@pytest.mark.django_db
+def test_ingest_news_from_rss(tmp_path):
+    feed = tmp_path / 'feed.rss'
+    feed.write_text(RSS_FEED, encoding='utf-8')
+    call_command('ingest_news', str(feed), stdout=StringIO())
+    news = News.objects.get(external_id='rss-1')
+    assert news.title == 'Новость из RSS'
+    assert news.summary == 'Текст новости из RSS'
+    assert news.date == date(2023, 1, 2)
+
+
+BROKEN_DATE_FEED = RSS_FEED.replace('rss-1', 'rss-2').replace(
+    'Mon, 02 Jan 2023 10:00:00 +0300', 'вчера вечером'
+)
+
+
+@pytest.mark.django_db
+def test_ingest_news_survives_broken_pub_date(tmp_path, caplog):
+    feed = tmp_path / 'feed.rss'
+    feed.write_text(BROKEN_DATE_FEED, encoding='utf-8')
+    call_command('ingest_news', str(feed), stdout=StringIO())
+    assert News.objects.get(external_id='rss-2').date == date.today()
+    assert 'вчера вечером' in caplog.text
+
+
+@pytest.mark.django_db
+def test_ingest_jsonl_survives_broken_date(tmp_path, caplog):
+    feed = tmp_path / 'feed.jsonl'
+    feed.write_text(
+        '{"id": 1, "title": "Новость", "text": "Т", "date": "вчера"}\n',
+        encoding='utf-8',
+    )
+    call_command('ingest_news', str(feed), stdout=StringIO())
+    assert News.objects.get(external_id='1').date == date.today()
+    assert 'вчера' in caplog.text
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('line', ('{"title": "Без id"}', '{"id": 2,'))
+def test_ingest_jsonl_names_broken_line(tmp_path, line):
+    feed = tmp_path / 'feed.jsonl'
+    feed.write_text(
+        '{"id": 1, "title": "Новость", "text": "Т"}\n' + line + '\n',
+        encoding='utf-8',
+    )
+    with pytest.raises(CommandError, match='Строка 2'):
+        call_command('ingest_news', str(feed), '--batch-size', '1',
+                     stdout=StringIO())
+    # Уже загруженные пачки остаются в базе.
+    assert News.objects.filter(external_id='1').exists()
+
+
+def test_parsed_rss_items_leave_the_tree(tmp_path, monkeypatch):
+    feed = tmp_path / 'feed.rss'
+    item = RSS_FEED[RSS_FEED.index('  <item>'):RSS_FEED.index('</channel>')]
+    feed.write_text(
+        RSS_FEED.replace(item, item + item.replace('rss-1', 'rss-2')),
+        encoding='utf-8',
+    )
+    parsers = []
+
+    def tracked_iterparse(*args, **kwargs):
+        parsers.append(iterparse(*args, **kwargs))
+        return parsers[-1]
+
+    monkeypatch.setattr(feeds, 'iterparse', tracked_iterparse)
+    assert len(list(feeds.parse_rss(feed))) == 2
+    assert parsers[0].root.find('channel/item') is None
+
+
+@pytest.mark.django_db
+def test_new_comment_is_published_after_commit(
+    monkeypatch, test_news, author_client, form_data,
+    django_capture_on_commit_callbacks
+):
+    class RecordingBroker:
+        def publish(self, channel, message):
+            published.append((channel, message))
+
+    published = []
+    monkeypatch.setattr('news.events.get_broker', RecordingBroker)
+    url = reverse('news:detail', args=(test_news.id,))
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url, data=form_data)
+    comment = Comment.objects.get()
+    assert published == [(f'news:{test_news.pk}:comments', {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': form_data['text'],
+        'created': comment.created.isoformat(),
+    })]
+
+
+@pytest.mark.django_db
+def test_sqlite_connection_is_tuned():
+    with connection.cursor() as cursor:
+        values = {}
+        for name in (
+            'journal_mode', 'synchronous', 'busy_timeout', 'cache_size'
+        ):
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    # synchronous: 1 — NORMAL.
+    assert values == {
+        'journal_mode': 'wal', 'synchronous': 1,
+        'busy_timeout': 5000, 'cache_size': -64 * 1024,
+    }
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_reads_go_to_replica_until_pinned(
+    settings, test_news, author_client, form_data
+):
+    settings.DATABASE_REPLICAS = ['replica']
+    url = reverse('news:detail', args=(test_news.id,))
+    # Новость ещё не доехала до реплики.
+    assert not News.objects.using('replica').exists()
+    response = author_client.post(url, data=form_data)
+    assert response.status_code == HTTPStatus.FOUND
+    assert PIN_COOKIE in response.cookies
+    # Автор сразу видит свой комментарий: читаем из основной базы.
+    response = author_client.get(url)
+    assert form_data['text'] in response.content.decode()
+    del author_client.cookies[PIN_COOKIE]
+    assert author_client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_fresh_fragment_is_filled_from_primary(settings, test_news, client):
+    settings.DATABASE_REPLICAS = ['replica']
+    url = reverse('news:home')
+    # Новость записана в основную базу, реплика ещё отстаёт.
+    invalidate_home()
+    assert test_news.title in client.get(url).content.decode()
+    # Окно отставания прошло: свежий фрагмент читается с реплики.
+    settings.REPLICA_PIN_SECONDS = 0
+    invalidate_home()
+    assert test_news.title not in client.get(url).content.decode()
+
+
+def test_replica_pin_keeps_async_chain_async():
+    async def get_response(request):
+        return None
+
+    assert asyncio.iscoroutinefunction(ReplicaPinMiddleware(get_response))
+    assert not asyncio.iscoroutinefunction(
+        ReplicaPinMiddleware(lambda request: None)
+    )
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_async_requests_are_pinned(settings, test_news, async_client):
+    settings.DATABASE_REPLICAS = ['replica']
+    url = reverse('news:detail', args=(test_news.id,))
+
+    async def get():
+        return await async_client.get(url)
+
+    # Новость ещё не доехала до реплики.
+    assert async_to_sync(get)().status_code == HTTPStatus.NOT_FOUND
+    async_client.cookies[PIN_COOKIE] = '1'
+    assert async_to_sync(get)().status_code == HTTPStatus.OK
+
+
+def test_query_recorder_flags_repeated_selects():
+    def execute(sql, params, many, context):
+        return None
+
+    single = 'SELECT "name" FROM "users" WHERE "id" = %s'
+    batch = 'SELECT "name" FROM "users" WHERE "id" IN (%s, %s)'
+    recorder = QueryRecorder()
+    for sql in (single, single, batch, batch, batch, single):
+        recorder(execute, sql, (1, 2), False, {})
+    recorder.new_segment()
+    for sql in (single, single):
+        recorder(execute, sql, (1,), False, {})
+    assert recorder.count == 8
+    assert recorder.repeated(3) == {single: 3}
+    assert recorder.repeated(4) == {}
+
+
+def seed_news(**options):
+    call_command('seed', users=5, news=20, comments=300, seed=7,
+                 batch_size=70, stdout=StringIO(), **options)
+    return list(News.objects.order_by('id').values_list(
+        'title', 'date', 'comment_count'
+    ))
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic_and_skewed():
+    first = seed_news()
+    assert len(first) == 20
+    assert Comment.objects.count() == 300
+    counts = sorted((count for _, _, count in first), reverse=True)
+    assert sum(counts) == 300
+    # Самая обсуждаемая новость собирает заметно больше средней.
+    assert counts[0] > 3 * 300 / 20
+    News.objects.all().delete()
+    get_user_model().objects.all().delete()
+    assert seed_news() == first
+
+
+@pytest.mark.django_db
+def test_seed_dates_count_back_from_today_option():
+    today = date(2020, 2, 29)
+    dates = [news_date for _, news_date, _ in seed_news(today=today)]
+    assert max(dates) <= today
+    assert min(dates) > today - timedelta(days=DAYS_BACK)
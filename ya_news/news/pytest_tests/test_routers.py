@@ -1,10 +1,18 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from http import HTTPStatus
 import pytest
 
 from news.models import Comment, News
+from yanews.instrumentation import (
+    InstrumentationMiddleware, watch_connections
+)
 
 
 User = get_user_model()
@@ -29,6 +37,7 @@ def test_pages_availability(client, setup_test_data):
     urls = [
         ('news:home', None),
         ('news:detail', (news.id,)),
+        ('news:search', None),
         ('users:login', None),
         ('users:logout', None),
         ('users:signup', None),
@@ -50,3 +59,66 @@ def test_redirect_for_anonymous_client(client, setup_test_data):
         response = client.get(url)
         assert response.status_code == HTTPStatus.FOUND
         assert response.url == redirect_url
+
+
+@pytest.mark.django_db
+def test_news_pages_conditional_get(client, setup_test_data):
+    news, author, _, _ = setup_test_data
+    for url in (reverse('news:home'), reverse('news:detail', args=(news.id,))):
+        response = client.get(url)
+        assert 'public' in response['Cache-Control']
+        assert 'Cookie' in response['Vary']
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        client.force_login(author)
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.OK
+        assert 'private' in response['Cache-Control']
+        client.logout()
+
+
+@pytest.mark.django_db
+def test_pages_are_timed(client, admin_client, setup_test_data):
+    news, _, _, _ = setup_test_data
+    url = reverse('news:detail', args=(news.id,))
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    # Журнал запросов очищается с началом следующего запроса.
+    query_count = len(queries)
+    timing = response['Server-Timing']
+    assert f'desc="{query_count} queries"' in timing
+    assert 'render;dur=' in timing and 'total;dur=' in timing
+    stats_url = reverse('instrumentation')
+    assert client.get(stats_url).status_code == HTTPStatus.FOUND
+    stats = admin_client.get(stats_url).json()['news:detail']
+    assert stats['requests'] == 1
+    assert stats['queries']['sum'] == query_count
+    assert sum(stats['total_ms']['buckets'].values()) == 1
+
+
+def test_instrumentation_keeps_async_chain_async():
+    async def get_response(request):
+        return None
+
+    assert asyncio.iscoroutinefunction(
+        InstrumentationMiddleware(get_response)
+    )
+    assert not asyncio.iscoroutinefunction(
+        InstrumentationMiddleware(lambda request: None)
+    )
+
+
+@pytest.mark.django_db
+def test_pages_are_timed_under_asgi(async_client, setup_test_data):
+    news, _, _, _ = setup_test_data
+    # Соединение теста открыто раньше, чем загружена middleware.
+    watch_connections()
+    url = reverse('news:detail', args=(news.id,))
+
+    async def get():
+        return await async_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = async_to_sync(get)()
+    assert response.status_code == HTTPStatus.OK
+    assert f'desc="{len(queries)} queries"' in response['Server-Timing']
@@ -0,0 +1,60 @@
+"""
+Полнотекстовый поиск по новостям.
+
+На SQLite запрос идёт в индекс FTS5 news_news_fts (миграция
+0008_news_search), который триггеры держат в согласии с news_news.
+С новостями индекс соединяется через модель NewsSearchIndex, результаты
+упорядочены по bm25; совпадение в заголовке весит больше, чем в тексте.
+Русского стеммера в SQLite нет, поэтому у слов
+отбрасываются конечные гласные, а оставшаяся основа ищется
+как префикс: «новости» находит и «новость», и «новостей».
+
+На других СУБД индекса нет, и поиск сводится к icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import NewsSearchIndex
+from .moderation import normalize
+
+SEARCH_TABLE = NewsSearchIndex._meta.db_table
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+WORD = re.compile(r'\w+')
+ENDINGS = 'аеиоуыэюяйь'
+MIN_STEM_LENGTH = 3
+
+
+def stem(word):
+    base = word.rstrip(ENDINGS)
+    return base if len(base) >= MIN_STEM_LENGTH else word
+
+
+def match_expression(query):
+    """Запрос пользователя как выражение MATCH: все слова-префиксы."""
+    return ' '.join(
+        f'"{stem(word)}"*' for word in WORD.findall(normalize(query))
+    )
+
+
+def search_news(news, query):
+    """Новости из queryset news, подходящие под запрос, лучшие первыми."""
+    expression = match_expression(query)
+    if not expression:
+        return news.none()
+    if connections[news.db].vendor != 'sqlite':
+        condition = Q()
+        for word in WORD.findall(query):
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return news.filter(condition).order_by('-date', '-id')
+    # bm25 считается по строке индекса, найденной этим же MATCH.
+    rank = RawSQL(
+        f'bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {TEXT_WEIGHT})', (),
+        output_field=FloatField(),
+    )
+    return news.filter(search_index__match=expression).annotate(
+        rank=rank
+    ).order_by('rank', '-id')
@@ -0,0 +1,46 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_comments, invalidate_home
+from .models import BannedWord, Comment, News
+from .moderation import invalidate_matcher
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_changed(**kwargs):
+    """Любая правка новости меняет главную страницу."""
+    transaction.on_commit(invalidate_home)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(instance, created, **kwargs):
+    """
+    Редактирование текста не влияет на главную, добавление — влияет.
+
+    Отметка updated новости меняется в той же транзакции, что
+    и комментарий: по ней строятся ETag и Last-Modified страницы.
+    Новый комментарий её уже обновил через shift_comment_count,
+    отдельный UPDATE нужен только при правке.
+    """
+    transaction.on_commit(partial(invalidate_comments, instance.news_id))
+    if created:
+        transaction.on_commit(invalidate_home)
+    else:
+        News.objects.filter(pk=instance.news_id).touch()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(instance, **kwargs):
+    News.objects.filter(pk=instance.news_id).touch()
+    transaction.on_commit(partial(invalidate_comments, instance.news_id))
+    transaction.on_commit(invalidate_home)
+
+
+@receiver(post_save, sender=BannedWord)
+@receiver(post_delete, sender=BannedWord)
+def banned_word_changed(**kwargs):
+    transaction.on_commit(invalidate_matcher)
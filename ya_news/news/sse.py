@@ -0,0 +1,105 @@
+"""
+Поток новых комментариев новости в формате Server-Sent Events.
+
+Django 3.2 не умеет отдавать асинхронные потоковые ответы, поэтому
+поток обслуживается небольшим ASGI-приложением перед Django:
+каждое соединение — это асинхронный генератор, ждущий в цикле
+событий, а не поток, заблокированный на очереди. Под WSGI этот адрес
+недоступен.
+"""
+import asyncio
+import json
+import re
+from contextlib import suppress
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .events import comments_channel, get_broker
+from .models import News
+
+EVENTS_PATH = re.compile(r'^/news/(?P<pk>\d+)/events/$')
+RETRY_MILLISECONDS = 3000
+
+
+def format_event(event, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    return f'event: {event}\ndata: {payload}\n\n'.encode()
+
+
+async def comment_events(news_id):
+    """Асинхронный генератор SSE-сообщений о новых комментариях."""
+    with get_broker().subscribe(comments_channel(news_id)) as subscription:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'.encode()
+        while True:
+            try:
+                message = await subscription.get(
+                    timeout=settings.NEWS_EVENTS_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                # Комментарий SSE: не даёт прокси закрыть соединение.
+                yield b': ping\n\n'
+                continue
+            yield format_event('comment', message)
+
+
+async def send_plain(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def stream_comments(news_id, receive, send):
+    exists = await sync_to_async(
+        News.objects.filter(pk=news_id).exists
+    )()
+    if not exists:
+        await send_plain(send, 404, b'Not Found')
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    async def pump():
+        async for chunk in comment_events(news_id):
+            await send({
+                'type': 'http.response.body',
+                'body': chunk,
+                'more_body': True,
+            })
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+    finally:
+        pump_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await pump_task
+
+
+class EventStreamRouter:
+    """ASGI-обёртка: SSE-адреса обслуживает сама, остальное — Django."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = (
+            EVENTS_PATH.match(scope['path'])
+            if scope['type'] == 'http' else None
+        )
+        if match is None:
+            return await self.application(scope, receive, send)
+        if scope['method'] != 'GET':
+            return await send_plain(send, 405, b'Method Not Allowed')
+        return await stream_comments(int(match['pk']), receive, send)
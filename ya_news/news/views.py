@@ -1,13 +1,40 @@
+from functools import partial
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.urls import reverse
 from django.views import generic
 
+from yanews.replicas import pin_to_primary
+
+from .cache import get_comments_version, get_home_version, is_recent
+from .conditions import detail_page_condition, home_page_condition
+from .events import publish_comment
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import get_comments_page, normalize_cursor
+from .search import search_news
+
 
+def fragment_version(version):
+    """
+    Версия фрагмента, который, возможно, придётся заполнить.
 
+    Пока версия свежая, данные для фрагмента читаются из основной
+    базы: иначе отставшая реплика навсегда (до следующего сброса)
+    записала бы старые данные под новой версией.
+    """
+    if is_recent(version):
+        pin_to_primary()
+    return version
+
+
+@method_decorator(home_page_condition, name='get')
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -18,22 +45,89 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев берётся из денормализованного поля,
+        сами комментарии не загружаются. Вместо полного текста
+        загружается только сохранённый анонс.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        return self.model.objects.only(
+            'id', 'title', 'date', 'summary', 'comment_count'
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
+    def get_context_data(self, **kwargs):
+        """
+        Добавляет в контекст версию кэша главной страницы.
+
+        Список новостей одинаков для всех посетителей и кэшируется
+        во фрагменте шаблона: запрос к базе выполняется лениво,
+        только при промахе кэша.
+        """
+        context = super().get_context_data(**kwargs)
+        context['home_cache_timeout'] = settings.NEWS_HOME_CACHE_TIMEOUT
+        context['home_version'] = fragment_version(get_home_version())
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """
+    Поиск новостей по заголовку и тексту.
+
+    Результаты упорядочены по релевантности и разбиты на страницы,
+    полный текст новостей не загружается.
+    """
+    model = News
+    template_name = 'news/search.html'
+
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_SEARCH_RESULTS_PER_PAGE
+
+    def get_queryset(self):
+        return search_news(
+            self.model.objects.only('id', 'title', 'date', 'summary'),
+            self.get_query(),
+        )
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(query=self.get_query(), **kwargs)
+
+
+class CommentThreadMixin:
+    """
+    Добавляет в контекст одну страницу комментариев новости.
+
+    Страница загружается лениво: если отрисованный фрагмент есть
+    в кэше с актуальной версией, к таблице комментариев не обращаемся.
+    Ссылки на правку видны только автору, поэтому фрагмент кэшируется
+    отдельно для каждого пользователя и один раз для всех анонимов.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Испорченный курсор — это начало ленты: один ключ фрагмента
+        # на позицию, а не новая запись кэша на каждое значение after.
+        cursor = normalize_cursor(self.request.GET.get('after'))
+        context['comments_page'] = SimpleLazyObject(
+            lambda: get_comments_page(self.object, cursor=cursor)
+        )
+        context['comments_cursor'] = cursor
+        context['comments_version'] = fragment_version(
+            get_comments_version(self.object.pk)
+        )
+        context['comments_cache_timeout'] = (
+            settings.NEWS_COMMENTS_CACHE_TIMEOUT
+        )
+        return context
 
-class NewsDetail(generic.DetailView):
+
+@method_decorator(detail_page_condition, name='get')
+class NewsDetail(CommentThreadMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +138,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentThreadMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,12 +154,16 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            News.objects.filter(pk=self.object.pk).shift_comment_count(1)
+            transaction.on_commit(partial(publish_comment, comment))
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +182,21 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Новость берём из уже загруженного комментария, без запроса."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Новость подтягивается тем же запросом: её заголовок выводится
+        в шаблонах правки и удаления.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +204,21 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        """Меняется только текст, остальные поля не перезаписываем."""
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=('text',))
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().delete(request, *args, **kwargs)
+            News.objects.filter(
+                pk=self.object.news_id
+            ).shift_comment_count(-1)
+        return response
@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Приложениям Django нужен настроенный реестр, поэтому импорт здесь.
+from news.sse import EventStreamRouter  # noqa: E402
+
+application = EventStreamRouter(django_application)
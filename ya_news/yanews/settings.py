@@ -21,6 +21,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: замеряет весь ответ, включая остальные слои.
+    'yanews.instrumentation.InstrumentationMiddleware',
+    # Первым: закрепление за основной базой — до любых запросов к ней.
+    'yanews.replicas.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,9 +57,55 @@ WSGI_APPLICATION = 'yanews.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с WAL и PRAGMA для нагрузки, см. yanews/sqlite3/base.py.
+        'ENGINE': 'yanews.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Соединение живёт между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': 60,
+        # Как и реплика, тестовая база — файл, а не общая база в памяти:
+        # тесты идут с теми же настройками соединения, что и в работе.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # Реплика для чтения; используется, только если указана
+    # в DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'yanews.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db_replica.sqlite3',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['yanews.replicas.ReplicaRouter']
+
+# Алиасы реплик для чтения. Пустой список — всё идёт в default.
+DATABASE_REPLICAS = []
+
+# Сколько секунд после записи читать посетителю из основной базы.
+REPLICA_PIN_SECONDS = 5
+
+CACHES = {
+    # Отрисованные фрагменты. У каждого процесса свои: в ключе есть
+    # версия данных, поэтому устаревший фрагмент не будет выдан.
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Версии фрагментов и словаря модерации, общие для всех воркеров,
+    # см. news/cache.py. Файловый кэш общий для процессов одной машины;
+    # при нескольких серверах здесь нужен Redis или Memcached.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'versions',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            # Версия на каждую новость с комментариями.
+            'MAX_ENTRIES': 100_000,
+        },
+    },
 }
 
 
@@ -80,3 +130,27 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_SEARCH_RESULTS_PER_PAGE = 20
+
+NEWS_HOME_CACHE_TIMEOUT = 15 * 60
+
+NEWS_PAGE_CACHE_MAX_AGE = 60
+
+# Асинхронные страницы чтения для запуска под ASGI.
+NEWS_ASYNC_VIEWS = False
+NEWS_ASYNC_DB_WORKERS = 8
+
+# Поток новых комментариев (SSE, только под ASGI).
+NEWS_EVENTS_BACKEND = 'news.events.InProcessBroker'
+NEWS_EVENTS_HEARTBEAT = 15
+NEWS_EVENTS_QUEUE_SIZE = 100
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+NEWS_COMMENTS_CACHE_TIMEOUT = 15 * 60
+
+BAD_WORDS_CHECK_INTERVAL = 5
+
+# Замеры запросов и заголовок Server-Timing, см. yanews/instrumentation.py.
+INSTRUMENTATION_ENABLED = True
@@ -0,0 +1,84 @@
+"""
+Пропускная способность и задержки горячих страниц YaNote.
+
+Создаёт временную файловую базу, заполняет её командой seed
+и тестовым клиентом Django от имени самого активного автора гоняет
+сценарии: список заметок, заметку и создание заметки. Результаты
+пишутся в JSON и сравниваются с эталоном (см. benchmarks/suite.py);
+при регрессии скрипт завершается с кодом 1.
+
+Запуск из директории ya_note (или ./run_benchmarks.sh из корня):
+    python -m benchmarks.bench_requests --requests 500
+"""
+import argparse
+import tempfile
+from io import StringIO
+from itertools import count
+from pathlib import Path
+
+from benchmarks import suite
+from benchmarks.utils import setup_django, test_database
+
+HOST = 'localhost'
+
+
+def scenarios(client, note):
+    from django.urls import reverse
+
+    numbers = count()
+    return (
+        ('notes:list', suite.request(client.get, reverse('notes:list'), 200)),
+        ('notes:detail', suite.request(
+            client.get, reverse('notes:detail', args=(note.slug,)), 200
+        )),
+        # Заголовки разные, чтобы мерить вставку, а не подбор slug.
+        ('notes:add', suite.request(
+            client.post, reverse('notes:add'), 302,
+            data=lambda: {
+                'title': f'Новая заметка {next(numbers)}', 'text': 'Текст',
+            },
+        )),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    suite.add_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db.models import Count
+    from django.test import Client
+
+    from notes.models import Note
+
+    # Замеры без журнала SQL-запросов режима отладки, как на сервере.
+    settings.DEBUG = False
+    params = {
+        'users': args.users, 'notes': args.notes,
+        'seed': args.seed, 'requests': args.requests,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        with test_database(Path(directory) / 'requests.sqlite3'):
+            call_command(
+                'seed', users=args.users, notes=args.notes, seed=args.seed,
+                stdout=StringIO(),
+            )
+            note = Note.objects.select_related('author').filter(
+                author=Note.objects.values('author').annotate(
+                    notes=Count('id')
+                ).order_by('-notes').values('author')[:1]
+            ).first()
+            client = Client(HTTP_HOST=HOST)
+            client.force_login(note.author)
+            results = suite.run(scenarios(client, note), args.requests)
+    suite.finish('ya_note', params, results, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Сравнение кэшированного slugify с прямым вызовом pytils.
+
+Корпус имитирует массовый импорт: заголовки собираются из
+типичных русских слов и часто повторяются (распределение Ципфа).
+
+Запуск из директории ya_note:
+    python -m benchmarks.bench_slugify
+"""
+import random
+import timeit
+
+from pytils.translit import slugify as translit_slugify
+
+from notes.slugs import slugify
+
+WORDS = (
+    'список', 'дел', 'покупки', 'идеи', 'для', 'проекта', 'встреча',
+    'с', 'командой', 'заметки', 'по', 'книге', 'план', 'на', 'неделю',
+    'рецепт', 'борща', 'отпуск', 'в', 'Сочи', 'Todo', 'черновик',
+    'отчёт', 'за', 'квартал', 'подарки', 'маме', 'ремонт', 'кухни',
+)
+UNIQUE_TITLES = 2_000
+CORPUS_SIZE = 200_000
+REPEAT = 3
+
+
+def make_corpus(rnd):
+    titles = [
+        ' '.join(rnd.choices(WORDS, k=rnd.randint(1, 5))).capitalize()
+        for _ in range(UNIQUE_TITLES)
+    ]
+    weights = [1 / rank for rank in range(1, UNIQUE_TITLES + 1)]
+    return rnd.choices(titles, weights=weights, k=CORPUS_SIZE)
+
+
+def run(func, corpus):
+    for title in corpus:
+        func(title)
+
+
+def main():
+    corpus = make_corpus(random.Random(42))
+    raw = min(timeit.repeat(
+        lambda: run(translit_slugify, corpus), number=1, repeat=REPEAT
+    ))
+    slugify.cache_clear()
+    cached = min(timeit.repeat(
+        lambda: run(slugify, corpus), number=1, repeat=REPEAT
+    ))
+    info = slugify.cache_info()
+    print(f'Заголовков: {CORPUS_SIZE}, уникальных: {UNIQUE_TITLES}')
+    print(f'pytils.slugify: {raw:.3f} с')
+    print(f'notes.slugs.slugify: {cached:.3f} с '
+          f'(попаданий в кэш: {info.hits}, промахов: {info.misses})')
+    print(f'Ускорение: {raw / cached:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import os
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    django.setup()
+
+
+@contextmanager
+def test_database(name=None):
+    """
+    Временная база с применёнными миграциями, как у тестов.
+
+    Без name берётся TEST['NAME'] из настроек — файл test_db.sqlite3,
+    с которым работают и тесты: бенчмарк пересоздал бы его под
+    идущим прогоном. Поэтому бенчмарки передают в name путь во
+    временной директории.
+    """
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку, без интерполяции."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,3 @@
+# Плагин подключается здесь, а не через -p в pytest.ini: к разбору
+# -p корень проекта ещё не добавлен в sys.path.
+pytest_plugins = ['yanote.query_budget']
@@ -0,0 +1,37 @@
+from time import monotonic
+
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.transfer import (
+    FIELDS, FORMATS, WRITERS, detect_format, open_stream
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для выгрузки, «-» — stdout.')
+        parser.add_argument('--format', dest='fmt', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--author', help='Только заметки этого автора.')
+
+    def handle(self, *args, path, fmt, chunk_size, author, **options):
+        notes = Note.objects.order_by('id')
+        if author:
+            notes = notes.filter(author__username=author)
+        started = monotonic()
+        exported = 0
+        with open_stream(path, 'w') as stream:
+            writer = WRITERS[detect_format(path, fmt)](stream)
+            for values in notes.values_list(
+                'title', 'text', 'slug', 'author__username'
+            ).iterator(chunk_size=chunk_size):
+                writer.write(dict(zip(FIELDS, values)))
+                exported += 1
+        elapsed = monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено заметок: {exported} '
+            f'({exported / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
@@ -0,0 +1,161 @@
+from itertools import islice
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from notes.models import Note
+from notes.slugs import allocate_slugs, slugify, taken_slugs
+from notes.transfer import (
+    FIELDS, FORMATS, detect_format, open_stream, read_rows
+)
+
+User = get_user_model()
+
+REQUIRED_FIELDS = ('title', 'text')
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из JSON Lines или CSV пачками через bulk_create. '
+        'Ожидаемые поля: title, text, slug (необязательно), author. '
+        'Заданные slug загружаются как есть, занятые считаются ошибкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками, «-» — stdin.')
+        parser.add_argument('--format', dest='fmt', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--author',
+            help='Автор для строк, в которых он не указан.',
+        )
+
+    def handle(self, *args, path, fmt, batch_size, author, **options):
+        self.default_author = author
+        self.author_ids = {}
+        started = monotonic()
+        imported = 0
+        with open_stream(path, 'r') as stream:
+            rows = read_rows(stream, detect_format(path, fmt))
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                imported += self.import_batch(batch)
+        elapsed = monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено заметок: {imported} '
+            f'({imported / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
+
+    def resolve_authors(self, rows):
+        """Id авторов по username; новые имена ищутся одним запросом."""
+        usernames = {row.get('author') or self.default_author for row in rows}
+        if None in usernames:
+            raise CommandError('Не указан автор заметки, задайте --author.')
+        missing = usernames - self.author_ids.keys()
+        self.author_ids.update(
+            User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'id')
+        )
+        unknown = missing - self.author_ids.keys()
+        if unknown:
+            raise CommandError(
+                f'Нет пользователей: {", ".join(sorted(unknown))}'
+            )
+
+    def check_row(self, line_number, row):
+        """
+        Строка — объект с обязательными полями, значения полей — строки,
+        а заданный slug проходит проверку Note.
+        """
+        if not isinstance(row, dict):
+            raise CommandError(
+                f'Строка {line_number}: ожидался объект с полями заметки.'
+            )
+        missing = [
+            field for field in REQUIRED_FIELDS if row.get(field) is None
+        ]
+        if missing:
+            raise CommandError(
+                f'Строка {line_number}: нет поля {", ".join(missing)}.'
+            )
+        not_strings = [
+            field for field in FIELDS
+            if row.get(field) is not None and not isinstance(row[field], str)
+        ]
+        if not_strings:
+            raise CommandError(
+                f'Строка {line_number}: не строка в поле '
+                f'{", ".join(not_strings)}.'
+            )
+        if row.get('slug'):
+            try:
+                Note._meta.get_field('slug').clean(row['slug'], None)
+            except ValidationError as error:
+                raise CommandError(
+                    f'Строка {line_number}: slug «{row["slug"]}» — '
+                    f'{" ".join(error.messages)}'
+                )
+
+    def check_slugs(self, slugs):
+        """
+        Заданные в файле slug не подменяются свободными.
+
+        slugs — пары (номер строки, slug). Slug, занятый в базе или
+        повторённый в файле, — ошибка с номером строки.
+        """
+        lines = {}
+        for line_number, slug in slugs:
+            lines.setdefault(slug, []).append(line_number)
+        taken = taken_slugs(Note.objects.all(), lines)
+        conflicts = sorted(
+            (line_number, slug)
+            for slug, numbers in lines.items()
+            for line_number in (numbers if slug in taken else numbers[1:])
+        )
+        if conflicts:
+            raise CommandError('Slug уже заняты: ' + ', '.join(
+                f'строка {line_number} — «{slug}»'
+                for line_number, slug in conflicts
+            ))
+
+    def import_batch(self, batch):
+        for line_number, row in batch:
+            self.check_row(line_number, row)
+        rows = [row for _, row in batch]
+        self.resolve_authors(rows)
+        title_length = Note._meta.get_field('title').max_length
+        slug_length = Note._meta.get_field('slug').max_length
+        explicit = [
+            (line_number, row['slug'])
+            for line_number, row in batch if row.get('slug')
+        ]
+        generated = [row for row in rows if not row.get('slug')]
+        try:
+            with transaction.atomic():
+                self.check_slugs(explicit)
+                slugs = iter(allocate_slugs(
+                    Note.objects.all(),
+                    [slugify(row['title'])[:slug_length] for row in generated],
+                    slug_length,
+                    reserved={slug for _, slug in explicit},
+                ))
+                Note.objects.bulk_create(
+                    Note(
+                        title=row['title'][:title_length],
+                        text=row['text'],
+                        slug=row.get('slug') or next(slugs),
+                        author_id=self.author_ids[
+                            row.get('author') or self.default_author
+                        ],
+                    )
+                    for row in rows
+                )
+        except (IntegrityError, ValueError) as error:
+            raise CommandError(f'Пачка не загружена: {error}')
+        return len(batch)
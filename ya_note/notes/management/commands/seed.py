@@ -0,0 +1,138 @@
+import random
+from itertools import accumulate
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from notes.models import Note
+from notes.slugs import allocate_slugs, slugify, with_suffix
+
+FIRST_NAMES = (
+    'Анна', 'Борис', 'Вера', 'Григорий', 'Дарья', 'Евгений', 'Жанна',
+    'Захар', 'Ирина', 'Кирилл', 'Любовь', 'Максим', 'Нина', 'Олег',
+    'Полина', 'Роман', 'Светлана', 'Тимур', 'Ульяна', 'Фёдор',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев',
+    'Козлов', 'Новиков', 'Морозов', 'Петров', 'Волков', 'Соловьёв',
+)
+TOPICS = (
+    'Список покупок', 'Планы', 'Идеи', 'Дела', 'Книги', 'Рецепт',
+    'Встреча', 'Отпуск', 'Ремонт', 'Подарки', 'Тренировки', 'Учёба',
+)
+DETAILS = (
+    'на выходные', 'на неделю', 'к празднику', 'для дачи', 'на завтра',
+    'по работе', 'для детей', 'на лето', 'к отпуску', 'на месяц',
+)
+WORDS = (
+    'купить', 'молоко', 'хлеб', 'позвонить', 'маме', 'записаться',
+    'к врачу', 'оплатить', 'счёт', 'прочитать', 'главу', 'забрать',
+    'посылку', 'полить', 'цветы', 'проверить', 'почту', 'встретить',
+    'друзей', 'сходить', 'в театр', 'убрать', 'балкон', 'повторить',
+    'слова',
+)
+SENTENCE_WORDS = (3, 9)
+SENTENCES = (1, 8)
+# Показатель закона Ципфа: немногие пользователи пишут большую часть
+# заметок, у большинства их единицы.
+NOTES_SKEW = 1.1
+
+
+def next_id(model):
+    """Первый свободный id: явные id нужны для внешних ключей пачек."""
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(start + batch_size, total)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками '
+        'для нагрузочных проверок. Результат определяется параметром '
+        '--seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--notes', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, users, notes, seed, batch_size, **options):
+        rnd = random.Random(seed)
+        started = monotonic()
+        user_ids = self.create_users(rnd, users, batch_size)
+        if not user_ids:
+            notes = 0
+        self.create_notes(rnd, notes, user_ids, batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, заметок: {notes} '
+            f'за {monotonic() - started:.1f} с'
+        ))
+
+    def create_users(self, rnd, total, batch_size):
+        User = get_user_model()
+        first_id = next_id(User)
+        for start, stop in batches(total, batch_size):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    User(
+                        id=first_id + index,
+                        username=(
+                            f'{rnd.choice(FIRST_NAMES)}_'
+                            f'{rnd.choice(LAST_NAMES)}_{first_id + index}'
+                        ),
+                        password=UNUSABLE_PASSWORD_PREFIX,
+                    )
+                    for index in range(start, stop)
+                )
+        return range(first_id, first_id + total)
+
+    def text(self, rnd):
+        sentences = []
+        for _ in range(rnd.randint(*SENTENCES)):
+            words = rnd.choices(WORDS, k=rnd.randint(*SENTENCE_WORDS))
+            sentences.append(' '.join(words).capitalize() + '.')
+        return ' '.join(sentences)
+
+    def create_notes(self, rnd, total, user_ids, batch_size):
+        title_length = Note._meta.get_field('title').max_length
+        slug_length = Note._meta.get_field('slug').max_length
+        first_id = next_id(Note)
+        # Активность не зависит от id: пользователи перемешаны.
+        ranked = list(user_ids)
+        rnd.shuffle(ranked)
+        weights = list(accumulate(
+            1 / (rank + 1) ** NOTES_SKEW for rank in range(len(ranked))
+        ))
+        for start, stop in batches(total, batch_size):
+            authors = rnd.choices(ranked, cum_weights=weights, k=stop - start)
+            titles = [
+                f'{rnd.choice(TOPICS)} {rnd.choice(DETAILS)}'[:title_length]
+                for _ in authors
+            ]
+            ids = range(first_id + start, first_id + stop)
+            # Суффикс из id делает slug уникальным; allocate_slugs
+            # страхует от совпадения с уже заданными вручную.
+            bases = [
+                with_suffix(slugify(title), note_id, slug_length)
+                for title, note_id in zip(titles, ids)
+            ]
+            with transaction.atomic():
+                slugs = allocate_slugs(Note.objects.all(), bases, slug_length)
+                Note.objects.bulk_create(
+                    Note(
+                        id=note_id, title=title, text=self.text(rnd),
+                        slug=slug, author_id=author_id,
+                    )
+                    for note_id, title, slug, author_id in zip(
+                        ids, titles, slugs, authors
+                    )
+                )
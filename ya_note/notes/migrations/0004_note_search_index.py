@@ -0,0 +1,25 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteSearchIndex',
+            fields=[
+                ('note', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='notes.note')),
+                ('match', models.TextField(db_column='notes_note_fts')),
+            ],
+            options={
+                'db_table': 'notes_note_fts',
+                'managed': False,
+            },
+        ),
+    ]
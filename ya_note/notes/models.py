@@ -1,7 +1,7 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import SLUG_ALLOCATION_ROUNDS, free_slug_candidates, slugify
 
 
 class Note(models.Model):
@@ -28,11 +28,74 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохраняет заметку, при пустом slug подбирая свободный.
+
+        Вместо проверки «есть ли такой slug» перед вставкой сразу
+        пытаемся сохранить заметку в точке сохранения. Если slug занят
+        (в том числе параллельным запросом), пробуем пачку кандидатов
+        с суффиксами, занятость которых проверяется одним запросом.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = self.get_slug_base()
+        if self._save_with_slug(base, *args, **kwargs):
+            return None
+        for round_number in range(SLUG_ALLOCATION_ROUNDS):
+            candidates = free_slug_candidates(
+                Note.objects.all(), base, max_slug_length, round_number
+            )
+            for slug in candidates:
+                if self._save_with_slug(slug, *args, **kwargs):
+                    return None
+        raise IntegrityError(f'Не удалось подобрать slug для «{base}».')
+
+    def get_slug_base(self):
+        """Slug по заголовку, с которого начинается подбор свободного."""
+        return slugify(self.title)[:self._meta.get_field('slug').max_length]
+
+    def _save_with_slug(self, slug, *args, **kwargs):
+        """Возвращает False, если slug занят; другие ошибки пробрасывает."""
+        self.slug = slug
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            self.slug = ''
+            if not Note.objects.filter(slug=slug).exists():
+                raise
+            return False
+        return True
+
+
+class NoteSearchIndex(models.Model):
+    """
+    Индекс FTS5 по заметкам из миграции 0003_note_search.
+
+    Таблицу создают миграции и заполняют триггеры; модель нужна только
+    поиску (см. notes/search.py), чтобы соединять её с заметками
+    средствами ORM. rowid индекса — id заметки, а скрытый столбец
+    с именем таблицы принимает выражение MATCH.
+    """
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    match = models.TextField(db_column='notes_note_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'notes_note_fts'
@@ -0,0 +1,64 @@
+"""
+Полнотекстовый поиск по заметкам.
+
+На SQLite запрос идёт в индекс FTS5 notes_note_fts (миграция
+0003_note_search), который триггеры держат в согласии с notes_note.
+С заметками индекс соединяется через модель NoteSearchIndex, результаты
+упорядочены по bm25; совпадение в заголовке весит больше, чем в тексте.
+Русского стеммера в SQLite нет, поэтому у слов
+отбрасываются конечные гласные, а оставшаяся основа ищется
+как префикс: «заметки» находит и «заметка», и «заметок».
+
+На других СУБД индекса нет, и поиск сводится к icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import NoteSearchIndex
+
+SEARCH_TABLE = NoteSearchIndex._meta.db_table
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+WORD = re.compile(r'\w+')
+ENDINGS = 'аеиоуыэюяйь'
+MIN_STEM_LENGTH = 3
+
+
+def normalize(text):
+    """Как в индексе: без различия регистра, Ё и Е."""
+    return text.casefold().replace('ё', 'е')
+
+
+def stem(word):
+    base = word.rstrip(ENDINGS)
+    return base if len(base) >= MIN_STEM_LENGTH else word
+
+
+def match_expression(query):
+    """Запрос пользователя как выражение MATCH: все слова-префиксы."""
+    return ' '.join(
+        f'"{stem(word)}"*' for word in WORD.findall(normalize(query))
+    )
+
+
+def search_notes(notes, query):
+    """Заметки из queryset notes, подходящие под запрос, лучшие первыми."""
+    expression = match_expression(query)
+    if not expression:
+        return notes.none()
+    if connections[notes.db].vendor != 'sqlite':
+        condition = Q()
+        for word in WORD.findall(query):
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return notes.filter(condition).order_by('-id')
+    # bm25 считается по строке индекса, найденной этим же MATCH.
+    rank = RawSQL(
+        f'bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {TEXT_WEIGHT})', (),
+        output_field=FloatField(),
+    )
+    return notes.filter(search_index__match=expression).annotate(
+        rank=rank
+    ).order_by('rank', '-id')
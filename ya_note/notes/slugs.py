@@ -0,0 +1,105 @@
+import random
+from functools import lru_cache
+
+from pytils.translit import slugify as translit_slugify
+
+SLUG_BATCH_SIZE = 10
+SLUG_ALLOCATION_ROUNDS = 5
+SLUGIFY_CACHE_SIZE = 4096
+# SQLite ограничивает число параметров в одном запросе.
+IN_QUERY_CHUNK_SIZE = 500
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def slugify(text):
+    """
+    Транслитерация pytils с кэшем последних заголовков.
+
+    Заголовки заметок часто повторяются («Todo», «Список покупок»),
+    а транслитерация заметно дороже поиска в словаре.
+    """
+    return translit_slugify(text)
+
+
+def with_suffix(base, suffix, max_length):
+    """Добавляет суффикс, укорачивая основу, чтобы влезть в max_length."""
+    suffix = f'-{suffix}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def slug_candidates(base, max_length, round_number):
+    """
+    Кандидаты в slug для очередного раунда подбора.
+
+    Сначала пробуем короткие суффиксы по порядку: -2, -3, ...
+    Если они заняты (популярный заголовок вроде «Todo»), переходим
+    на случайные суффиксы растущей длины, чтобы параллельные запросы
+    не конкурировали за одни и те же значения.
+    """
+    if round_number == 0:
+        suffixes = range(2, 2 + SLUG_BATCH_SIZE)
+    else:
+        low = 10 ** (round_number + 1)
+        suffixes = random.sample(range(low, low * 10), SLUG_BATCH_SIZE)
+    return [with_suffix(base, suffix, max_length) for suffix in suffixes]
+
+
+def taken_slugs(queryset, candidates):
+    """Какие из кандидатов уже заняты; запросы идут пачками через IN."""
+    candidates = list(candidates)
+    taken = set()
+    for start in range(0, len(candidates), IN_QUERY_CHUNK_SIZE):
+        taken.update(queryset.filter(
+            slug__in=candidates[start:start + IN_QUERY_CHUNK_SIZE]
+        ).values_list('slug', flat=True))
+    return taken
+
+
+def free_slug_candidates(queryset, base, max_length, round_number):
+    """Свободные кандидаты раунда; занятость проверяется одним IN."""
+    candidates = slug_candidates(base, max_length, round_number)
+    taken = taken_slugs(queryset, candidates)
+    return [slug for slug in candidates if slug not in taken]
+
+
+def allocate_slugs(queryset, bases, max_length, reserved=()):
+    """
+    Подбирает уникальные slug сразу для пачки заметок.
+
+    Сначала проверяются сами основы, затем для занятых — раунды
+    кандидатов из slug_candidates. На раунд приходится один IN-запрос
+    на всю пачку, а не запрос на каждую заметку. Slug должны быть
+    уникальны и среди самой пачки, и не совпадать с reserved — уже
+    выбранными slug остальных заметок пачки.
+    """
+    slugs = [None] * len(bases)
+    used = set(reserved)
+    pending = list(range(len(bases)))
+    for round_number in range(-1, SLUG_ALLOCATION_ROUNDS):
+        options = {
+            index: (
+                [bases[index]] if round_number < 0
+                else slug_candidates(bases[index], max_length, round_number)
+            )
+            for index in pending
+        }
+        taken = taken_slugs(queryset, {
+            slug for candidates in options.values() for slug in candidates
+        } - used)
+        left = []
+        for index in pending:
+            free = [
+                slug for slug in options[index]
+                if slug not in taken and slug not in used
+            ]
+            if not free:
+                left.append(index)
+                continue
+            slugs[index] = free[0]
+            used.add(free[0])
+        pending = left
+        if not pending:
+            return slugs
+    raise ValueError(
+        f'Не удалось подобрать slug для «{bases[pending[0]]}».'
+    )
@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+import pytest
+
 from notes.models import Note
 from notes.forms import NoteForm
 
@@ -40,3 +44,98 @@ class NoteTests(TestCase):
         response = self.client.get(reverse('notes:detail',
                                            args=[self.note_user2.slug]))
         self.assertNotIn('object', response.context)
+
+
+@override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+class TestNotesListPagination(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = get_user_model().objects.create(username='Автор')
+        cls.notes = [
+            Note.objects.create(title=f'Заметка {index}', text='Текст',
+                                slug=f'note-{index}', author=cls.author)
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_pages_cover_all_notes_in_order(self):
+        url = reverse('notes:list')
+        seen = []
+        response = self.client.get(url)
+        while True:
+            seen.extend(note.id for note in response.context['object_list'])
+            next_cursor = response.context['next_cursor']
+            if next_cursor is None:
+                break
+            response = self.client.get(url, {'after': next_cursor})
+        self.assertEqual(seen, [note.id for note in self.notes])
+
+    def test_out_of_range_cursor_is_ignored(self):
+        url = reverse('notes:list')
+        first_page = self.client.get(url).context['object_list']
+        for cursor in (str(10 ** 30), '-1'):
+            response = self.client.get(url, {'after': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['object_list'], first_page)
+
+    # Сессия, пользователь и страница заметок.
+    @pytest.mark.query_budget(3)
+    def test_list_query_budget(self):
+        self.client.get(reverse('notes:list'))
+
+    def test_list_does_not_load_text(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('notes:list'))
+        notes_sql = [
+            query['sql'] for query in queries.captured_queries
+            if 'notes_note' in query['sql']
+        ]
+        self.assertEqual(len(notes_sql), 1)
+        self.assertNotIn('"notes_note"."text"', notes_sql[0])
+
+
+@override_settings(NOTES_SEARCH_RESULTS_PER_PAGE=2)
+class TestNotesSearch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = get_user_model().objects.create(username='Автор')
+        cls.other = get_user_model().objects.create(username='Другой')
+        cls.in_text = Note.objects.create(
+            title='Покупки', text='Купить ёлку', author=cls.author
+        )
+        cls.in_title = Note.objects.create(
+            title='Ёлка к празднику', text='Выбрать', author=cls.author
+        )
+        Note.objects.create(title='Ёлка', text='Чужая', author=cls.other)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('notes:search'), {'q': query, **params}
+        ).context
+
+    def test_results_are_ranked_and_scoped_to_author(self):
+        self.assertEqual(
+            list(self.search('ЕЛКИ')['object_list']),
+            [self.in_title, self.in_text],
+        )
+
+    def test_results_are_paginated(self):
+        Note.objects.create(title='Ёлки', text='', author=self.author)
+        self.assertEqual(self.search('елки')['paginator'].count, 3)
+        self.assertEqual(len(self.search('елки', page=2)['object_list']), 1)
+
+    def test_index_follows_edits(self):
+        self.in_text.text = 'Купить хлеб'
+        self.in_text.save()
+        self.in_title.delete()
+        self.assertFalse(self.search('елки')['object_list'])
+        self.assertEqual(
+            list(self.search('хлеба')['object_list']), [self.in_text]
+        )
@@ -1,9 +1,27 @@
+import asyncio
+import threading
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import (
+    Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+import pytest
+from pytils.translit import slugify as translit_slugify
+
 from notes.models import Note
-from notes.forms import NoteForm
+from notes.forms import WARNING, NoteForm
+from notes.slugs import slugify
+from yanote.replicas import PIN_COOKIE, ReplicaPinMiddleware
 
 
 class NoteTestCase(TestCase):
@@ -65,6 +83,27 @@ class NoteTestCase(TestCase):
         form = NoteForm(data=form_data, instance=self.note)
         self.assertFalse(form.is_valid())
 
+    # Занятость slug проверяют форма, подбор в Note.save
+    # и NoteFormBase.form_valid перед показом ошибки: это не N+1.
+    @pytest.mark.filterwarnings('ignore::yanote.query_budget.'
+                                'RepeatedQueriesWarning')
+    def test_late_slug_conflict_names_taken_slug(self):
+        # Свободного slug не нашлось: занятым назван подобранный
+        # по заголовку, а не пустое значение из формы.
+        form_data = {'title': self.note.title, 'text': 'Text', 'slug': ''}
+        with mock.patch('notes.models.SLUG_ALLOCATION_ROUNDS', 0):
+            response = self.user1_client.post(
+                self._get_url('add'), data=form_data)
+        self.assertFormError(
+            response, 'form', 'slug', self.note.slug + WARNING)
+
+    def test_other_integrity_errors_are_not_slug_errors(self):
+        form_data = {'title': 'Новая заметка', 'text': 'Text', 'slug': ''}
+        with mock.patch.object(
+            Note, 'save', side_effect=IntegrityError('NOT NULL')
+        ), self.assertRaises(IntegrityError):
+            self.user1_client.post(self._get_url('add'), data=form_data)
+
     def test_user_permissions(self):
         views = {'edit': 'Test Note 1', 'delete': 'Test Note 2'}
         for view, title in views.items():
@@ -76,3 +115,206 @@ class NoteTestCase(TestCase):
                 response = self.user2_client.get(
                     self._get_url(view, kwargs={'slug': note.slug}))
                 self.assertEqual(response.status_code, 404)
+
+
+class TestSlugAllocation(TransactionTestCase):
+    THREADS = 8
+    NOTES_PER_THREAD = 5
+
+    def setUp(self):
+        self.author = get_user_model().objects.create(username='Автор')
+
+    def test_duplicate_titles_get_suffixes(self):
+        slugs = [
+            Note.objects.create(title='Todo', text='Текст',
+                                author=self.author).slug
+            for _ in range(3)
+        ]
+        self.assertEqual(slugs, ['todo', 'todo-2', 'todo-3'])
+
+    def test_happy_path_has_no_existence_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            Note.objects.create(title='Todo', text='Текст',
+                                author=self.author)
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(selects, [])
+
+    def test_concurrent_creates_with_same_title(self):
+        errors = []
+
+        def create_notes():
+            try:
+                for _ in range(self.NOTES_PER_THREAD):
+                    Note.objects.create(title='Todo', text='Текст',
+                                        author=self.author)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=create_notes)
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), self.THREADS * self.NOTES_PER_THREAD)
+        self.assertEqual(len(set(slugs)), len(slugs))
+
+
+class TestCachedSlugify(SimpleTestCase):
+
+    def test_matches_pytils_and_hits_cache(self):
+        title = 'Список покупок на неделю'
+        slugify.cache_clear()
+        self.assertEqual(slugify(title), translit_slugify(title))
+        self.assertEqual(slugify(title), translit_slugify(title))
+        self.assertEqual(slugify.cache_info().hits, 1)
+
+
+class TestNotesTransfer(TestCase):
+    FIELDS = ('title', 'text', 'slug', 'author')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = get_user_model().objects.create(username='Автор')
+        for index in range(5):
+            Note.objects.create(title='Список дел', text=f'Пункт {index}',
+                                author=cls.author)
+        cls.exported = list(
+            Note.objects.values_list(*cls.FIELDS).order_by('id')
+        )
+
+    def test_export_import_roundtrip(self):
+        for fmt in ('jsonl', 'csv'):
+            with self.subTest(fmt=fmt), TemporaryDirectory() as directory:
+                path = Path(directory) / f'notes.{fmt}'
+                call_command('notes_export', str(path), stderr=StringIO())
+                Note.objects.all().delete()
+                call_command('notes_import', str(path), '--batch-size', '2',
+                             stdout=StringIO())
+                imported = Note.objects.values_list(*self.FIELDS)
+                self.assertEqual(list(imported.order_by('id')), self.exported)
+
+    def test_import_reports_row_errors(self):
+        taken = Note.objects.first().slug
+        note = '{{"title": "З", "text": "Т", "slug": "{}"}}\n'
+        cases = (
+            ('{"title": "З"}\n', 'Строка 1: нет поля text.'),
+            (note.format('не slug'), 'Строка 1: slug «не slug»'),
+            (note.format(taken), f'строка 1 — «{taken}»'),
+            ('\n' + note.format('new') * 2, 'строка 3 — «new»'),
+            ('{"title": "З",\n', 'Строка 1: не JSON'),
+            ('[1, 2]\n', 'Строка 1: ожидался объект'),
+            ('{"title": 5, "text": "Т"}\n',
+             'Строка 1: не строка в поле title.'),
+        )
+        for content, message in cases:
+            with self.subTest(content=content), \
+                    TemporaryDirectory() as directory:
+                path = Path(directory) / 'notes.jsonl'
+                path.write_text(content, encoding='utf-8')
+                with self.assertRaisesMessage(CommandError, message):
+                    call_command('notes_import', str(path), '--author',
+                                 'Автор', stdout=StringIO())
+        self.assertEqual(Note.objects.count(), 5)
+
+    def test_import_requires_known_author(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            path.write_text(
+                '{"title": "Заметка", "text": "Текст", "author": "никто"}\n',
+                encoding='utf-8',
+            )
+            with self.assertRaises(CommandError):
+                call_command('notes_import', str(path), stdout=StringIO())
+        self.assertEqual(Note.objects.count(), 5)
+
+
+class TestSqlitePragmas(TestCase):
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_is_tuned(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        # 1 — NORMAL.
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestReplicaRouting(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='author')
+        self.client.force_login(self.user)
+        # Реплика догнала основную базу до создания заметки.
+        get_user_model().objects.using('replica').bulk_create([self.user])
+        Session.objects.using('replica').bulk_create(
+            Session.objects.using('default').all()
+        )
+
+    def listed_titles(self):
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, 200)
+        return [note.title for note in response.context['object_list']]
+
+    def test_reads_follow_pin_after_write(self):
+        response = self.client.post(
+            reverse('notes:add'), {'title': 'Новая', 'text': 'Текст'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(Note.objects.using('default').count(), 1)
+        self.assertFalse(Note.objects.using('replica').exists())
+        # Автор сразу видит свою заметку: читаем из основной базы.
+        self.assertEqual(self.listed_titles(), ['Новая'])
+        # Закрепление истекло — чтение снова идёт на отстающую реплику.
+        del self.client.cookies[PIN_COOKIE]
+        self.assertEqual(self.listed_titles(), [])
+
+    def test_async_chain_stays_async(self):
+        async def get_response(request):
+            return None
+
+        self.assertTrue(asyncio.iscoroutinefunction(
+            ReplicaPinMiddleware(get_response)
+        ))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            ReplicaPinMiddleware(lambda request: None)
+        ))
+
+
+class TestSeedCommand(TestCase):
+
+    def seed(self):
+        call_command('seed', users=5, notes=40, seed=7, batch_size=15,
+                     stdout=StringIO())
+        return list(Note.objects.order_by('id').values_list(
+            'title', 'author__username'
+        ))
+
+    def test_seed_is_deterministic(self):
+        first = self.seed()
+        self.assertEqual(get_user_model().objects.count(), 5)
+        self.assertEqual(len(first), 40)
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs)), len(slugs))
+        Note.objects.all().delete()
+        get_user_model().objects.all().delete()
+        self.assertEqual(
+            [title for title, _ in self.seed()],
+            [title for title, _ in first],
+        )
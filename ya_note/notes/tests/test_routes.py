@@ -1,10 +1,17 @@
+import asyncio
 from http import HTTPStatus
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.models import Note
+from yanote.instrumentation import (
+    InstrumentationMiddleware, registry, watch_connections
+)
 
 
 User = get_user_model()
@@ -40,7 +47,8 @@ class TestRoutes(TestCase):
         )
         for user, status in users_statuses:
             self.client.force_login(user)
-            for name in ('notes:list', 'notes:success', 'notes:add'):
+            for name in ('notes:list', 'notes:search', 'notes:success',
+                         'notes:add'):
                 with self.subTest(user=user, name=name):
                     url = reverse(name)
                     response = self.client.get(url)
@@ -67,9 +75,66 @@ class TestRoutes(TestCase):
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
-        for name in ('notes:list', 'notes:success', 'notes:add'):
+        for name in ('notes:list', 'notes:search', 'notes:success',
+                     'notes:add'):
             with self.subTest(name=name):
                 url = reverse(name)
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+
+class TestInstrumentation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.staff = User.objects.create(username='Сотрудник', is_staff=True)
+
+    def setUp(self):
+        registry.reset()
+
+    def test_pages_are_timed(self):
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('notes:list'))
+        # Журнал запросов очищается с началом следующего запроса.
+        query_count = len(queries)
+        self.assertIn(
+            f'desc="{query_count} queries"', response['Server-Timing']
+        )
+        stats_url = reverse('instrumentation')
+        self.assertEqual(
+            self.client.get(stats_url).status_code, HTTPStatus.FOUND
+        )
+        self.client.force_login(self.staff)
+        stats = self.client.get(stats_url).json()['notes:list']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['queries']['sum'], query_count)
+        self.assertEqual(sum(stats['render_ms']['buckets'].values()), 1)
+
+    def test_async_chain_stays_async(self):
+        async def get_response(request):
+            return None
+
+        self.assertTrue(asyncio.iscoroutinefunction(
+            InstrumentationMiddleware(get_response)
+        ))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            InstrumentationMiddleware(lambda request: None)
+        ))
+
+    def test_pages_are_timed_under_asgi(self):
+        # Соединение теста открыто раньше, чем загружена middleware.
+        watch_connections()
+        self.async_client.force_login(self.author)
+
+        async def get():
+            return await self.async_client.get(reverse('notes:list'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(get)()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            f'desc="{len(queries)} queries"', response['Server-Timing']
+        )
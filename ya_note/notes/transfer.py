@@ -0,0 +1,74 @@
+import csv
+import json
+import sys
+from contextlib import contextmanager
+
+from django.core.management.base import CommandError
+
+FIELDS = ('title', 'text', 'slug', 'author')
+FORMATS = ('jsonl', 'csv')
+
+
+def detect_format(path, fmt=None):
+    """Формат из параметра команды или из расширения файла."""
+    if fmt:
+        return fmt
+    return 'csv' if str(path).endswith('.csv') else 'jsonl'
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Файл по пути или stdin/stdout для «-»."""
+    if path == '-':
+        yield sys.stdin if 'r' in mode else sys.stdout
+        return
+    with open(path, mode, encoding='utf-8', newline='') as stream:
+        yield stream
+
+
+def read_rows(stream, fmt):
+    """
+    Построчно читает заметки, не загружая файл целиком.
+
+    Отдаёт пары (номер строки файла, заметка): по номеру строки
+    команда импорта сообщает, где ошибка. Строка, которая не разбирается
+    как JSON, — CommandError с её номером.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            raise CommandError(f'Строка {line_number}: не JSON ({error}).')
+        yield line_number, row
+
+
+class JsonLinesWriter:
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+class CsvWriter:
+
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+}
@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import search_notes
+
+# Больший id SQLite не примет: OverflowError вместо пустой страницы.
+MAX_ID = 2 ** 63 - 1
 
 
 class Home(generic.TemplateView):
@@ -26,22 +32,41 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormBase(NoteBase):
+    """Базовый класс для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Обрабатывает slug, занятый параллельным запросом.
+
+        Это возможно уже после проверки формы, тогда показываем
+        ту же ошибку, что и при обычной проверке. Если slug не был
+        задан, занят тот, что подбирался по заголовку. Другие нарушения
+        целостности, как и в Note._save_with_slug, пробрасываются.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            slug = form.instance.slug or form.instance.get_slug_base()
+            if not Note.objects.filter(slug=slug).exists():
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormBase, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormBase, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,9 +75,70 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список всех заметок пользователя.
+
+    Заметки выводятся по возрастанию id страницами, следующая страница
+    начинается после id последней заметки предыдущей (keyset-пагинация
+    по индексу (author, id)). Текст заметок в списке не нужен
+    и не загружается.
+    """
     template_name = 'notes/list.html'
 
+    def get_cursor(self):
+        try:
+            cursor = int(self.request.GET['after'])
+        except (KeyError, ValueError):
+            return None
+        return cursor if 0 <= cursor <= MAX_ID else None
+
+    def get_queryset(self):
+        notes = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        cursor = self.get_cursor()
+        if cursor is not None:
+            notes = notes.filter(id__gt=cursor)
+        return notes
+
+    def get_context_data(self, **kwargs):
+        per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+        notes = list(self.object_list[:per_page + 1])
+        next_cursor = None
+        if len(notes) > per_page:
+            notes = notes[:per_page]
+            next_cursor = notes[-1].id
+        return super().get_context_data(
+            object_list=notes,
+            next_cursor=next_cursor,
+            **kwargs
+        )
+
+
+class NotesSearch(NoteBase, generic.ListView):
+    """
+    Поиск по заметкам пользователя.
+
+    Результаты упорядочены по релевантности и разбиты на страницы,
+    текст заметок не загружается.
+    """
+    template_name = 'notes/search.html'
+
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_SEARCH_RESULTS_PER_PAGE
+
+    def get_queryset(self):
+        return search_notes(
+            super().get_queryset().only('id', 'slug', 'title'),
+            self.get_query(),
+        )
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(query=self.get_query(), **kwargs)
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
@@ -0,0 +1,233 @@
+"""
+Замеры времени ответа по страницам.
+
+InstrumentationMiddleware считает для каждого запроса число
+SQL-запросов, время в базе, время отрисовки шаблона и полное время
+ответа. Замеры уходят клиенту в заголовке Server-Timing и копятся
+в гистограммах по имени URL (notes:list, notes:detail, …), которые
+сотрудники читают через stats_view.
+
+Запросы считает обёртка watch_query, которая ставится на каждое
+соединение с базой, а замеры текущего запроса она берёт из contextvar.
+Поэтому в замеры попадают и запросы из других потоков: синхронных
+представлений под ASGI и пула асинхронных представлений, если их
+контекст скопирован из запроса.
+
+Middleware работает и в синхронной, и в асинхронной цепочке: под ASGI
+она не переводит всю цепочку в один поток синхронного кода.
+
+Накладные расходы — два вызова perf_counter на SQL-запрос
+и короткая блокировка на запрос, так что замеры можно не выключать.
+Гистограммы свои у каждого процесса и живут до его перезапуска.
+
+Копия yanews/instrumentation.py с другими примерами имён URL. Проекты
+развёртываются по отдельности и общего кода не делят, поэтому
+изменения повторяются в обоих файлах.
+"""
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import JsonResponse
+
+MILLISECOND_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNRESOLVED = '<unresolved>'
+
+
+class Histogram:
+    """Счётчики по верхним границам корзин; последняя — «больше всех»."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'buckets': dict(zip(bounds, self.counts)),
+            'sum': round(self.total, 3),
+        }
+
+
+class PageStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db = Histogram(MILLISECOND_BUCKETS)
+        self.render = Histogram(MILLISECOND_BUCKETS)
+        self.total = Histogram(MILLISECOND_BUCKETS)
+
+    def add(self, timing):
+        self.requests += 1
+        self.queries.add(timing.queries)
+        self.db.add(timing.db)
+        self.render.add(timing.render)
+        self.total.add(timing.total)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'queries': self.queries.as_dict(),
+            'db_ms': self.db.as_dict(),
+            'render_ms': self.render.as_dict(),
+            'total_ms': self.total.as_dict(),
+        }
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = {}
+
+    def add(self, url_name, timing):
+        with self.lock:
+            if url_name not in self.pages:
+                self.pages[url_name] = PageStats()
+            self.pages[url_name].add(timing)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                url_name: stats.as_dict()
+                for url_name, stats in sorted(self.pages.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.pages = {}
+
+
+registry = Registry()
+_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Замеры одного запроса; времена в миллисекундах."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += (time.perf_counter() - started) * 1000
+
+    def rendered(self, response):
+        self.render += (time.perf_counter() - self.render_started) * 1000
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db:.1f};desc="{self.queries} queries", '
+            f'render;dur={self.render:.1f}, total;dur={self.total:.1f}'
+        )
+
+
+def watch_query(execute, sql, params, many, context):
+    """Обёртка execute_wrapper: запрос в замеры текущего HTTP-запроса."""
+    timing = _timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing(execute, sql, params, many, context)
+
+
+def watch_connection(connection):
+    if watch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(watch_query)
+
+
+def watch_connections():
+    """Ставит обёртку на соединения текущего потока, открытые раньше."""
+    for connection in connections.all():
+        watch_connection(connection)
+
+
+@receiver(connection_created)
+def watch_new_connection(sender, connection, **kwargs):
+    watch_connection(connection)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как у MiddlewareMixin: обработчик ASGI должен видеть,
+            # что вызов middleware возвращает корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+        watch_connections()
+        timing = request.timing = RequestTiming()
+        started = time.perf_counter()
+        token = _timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timing.reset(token)
+        return self.finish(request, response, started)
+
+    async def __acall__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return await self.get_response(request)
+        timing = request.timing = RequestTiming()
+        started = time.perf_counter()
+        token = _timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timing.reset(token)
+        return self.finish(request, response, started)
+
+    def finish(self, request, response, started):
+        timing = request.timing
+        timing.total = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        registry.add(match.view_name if match else UNRESOLVED, timing)
+        response['Server-Timing'] = timing.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, 'timing', None)
+        # Уже отрисованный ответ (пул асинхронных представлений) свою
+        # отрисовку замерил сам.
+        if timing is not None and not response.is_rendered:
+            timing.render_started = time.perf_counter()
+            response.add_post_render_callback(timing.rendered)
+        return response
+
+
+@staff_member_required
+def stats_view(request):
+    """Накопленные гистограммы по страницам в JSON."""
+    return JsonResponse(registry.as_dict(), json_dumps_params={
+        'ensure_ascii': False,
+    })
@@ -0,0 +1,159 @@
+"""
+Плагин pytest: бюджет SQL-запросов на тест и поиск N+1.
+
+Подключается в conftest.py в корне проекта, маркер и порог описаны
+в pytest.ini. Во время каждого теста записываются SQL-запросы ко всем
+базам (только из потока теста). Запросы делятся на отрезки по началу
+HTTP-запроса тестового клиента, и если в одном отрезке SELECT одной
+формы (SQL без значений параметров) повторяется query_repeat_threshold
+и более раз, это похоже на N+1. Выборки по IN (...) — это пакетная
+загрузка, их повторы не в счёт.
+
+Тест с маркером @pytest.mark.query_budget(n) падает, если запросов
+больше n или если найден N+1: вердикт запоминается после вызова теста и
+превращает отчёт о нём в провал, исключение из обёртки хука pluggy не
+пропускает. Остальные тесты о N+1 только предупреждают. У тестов на
+unittest не считаются запросы setUp, tearDown и служебные транзакции
+TestCase — только сам тест.
+
+Плагин повторяет yanews/query_budget.py: каждый проект подключает свой
+из conftest.py и гоняет тесты отдельно, так что копия намеренная,
+а правки нужны в обеих.
+"""
+import re
+import warnings
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+
+import pytest
+from django.core.signals import request_started
+from django.db import connections
+
+DEFAULT_REPEAT_THRESHOLD = 3
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+SELECT = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+UNITTEST_FIXTURES = ('_pre_setup', 'setUp', 'tearDown', '_post_teardown')
+VERDICT = pytest.StashKey[str]()
+
+
+class RepeatedQueriesWarning(pytest.PytestWarning):
+    """Один и тот же SELECT повторяется в рамках одного запроса."""
+
+
+def is_single_select(sql):
+    """SELECT, который при N+1 повторяется для каждой строки."""
+    return SELECT.match(sql) is not None and IN_LIST.search(sql) is None
+
+
+class QueryRecorder:
+
+    def __init__(self):
+        self.count = 0
+        self.segments = [Counter()]
+        self.paused = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper."""
+        if self.paused:
+            return execute(sql, params, many, context)
+        self.count += 1
+        if is_single_select(sql):
+            self.segments[-1][sql] += 1
+        return execute(sql, params, many, context)
+
+    def new_segment(self, **kwargs):
+        """Приёмник request_started: новый HTTP-запрос — новый отрезок."""
+        self.segments.append(Counter())
+
+    def repeated(self, threshold):
+        """SELECT, повторившиеся в одном отрезке threshold и более раз."""
+        worst = Counter()
+        for segment in self.segments:
+            for shape, count in segment.items():
+                if count >= threshold:
+                    worst[shape] = max(worst[shape], count)
+        return worst
+
+
+def paused(recorder, method):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        recorder.paused = True
+        try:
+            return method(*args, **kwargs)
+        finally:
+            recorder.paused = False
+    return wrapper
+
+
+def describe(repeated):
+    return '\n'.join(
+        f'  {count} раз: {shape}' for shape, count in repeated.most_common()
+    )
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        'query_repeat_threshold',
+        'Сколько одинаковых SELECT в одном запросе считать N+1.',
+        default=str(DEFAULT_REPEAT_THRESHOLD),
+    )
+
+
+def pause_unittest_fixtures(item, recorder):
+    """Не считает запросы подготовки и уборки теста на unittest."""
+    testcase = getattr(item, '_testcase', None)
+    for name in UNITTEST_FIXTURES:
+        method = getattr(testcase, name, None)
+        if method is not None:
+            setattr(testcase, name, paused(recorder, method))
+
+
+def check_budget(item, recorder):
+    """Текст провала теста с маркером query_budget или None."""
+    repeated = recorder.repeated(
+        int(item.config.getini('query_repeat_threshold'))
+    )
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        if repeated:
+            warnings.warn(RepeatedQueriesWarning(
+                f'Похоже на N+1 в {item.nodeid}:\n{describe(repeated)}'
+            ))
+        return None
+    budget = marker.args[0]
+    problems = []
+    if recorder.count > budget:
+        problems.append(
+            f'{recorder.count} SQL-запросов при бюджете {budget}.'
+        )
+    if repeated:
+        problems.append(f'Похоже на N+1:\n{describe(repeated)}')
+    return '\n'.join(problems) or None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    recorder = QueryRecorder()
+    pause_unittest_fixtures(item, recorder)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        request_started.connect(recorder.new_segment)
+        stack.callback(request_started.disconnect, recorder.new_segment)
+        outcome = yield
+    if outcome.excinfo is None:
+        verdict = check_budget(item, recorder)
+        if verdict:
+            item.stash[VERDICT] = verdict
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Прошедший тест, который превысил бюджет, отмечается проваленным."""
+    outcome = yield
+    report = outcome.get_result()
+    if call.when == 'call' and report.passed and VERDICT in item.stash:
+        report.outcome = 'failed'
+        report.longrepr = item.stash[VERDICT]
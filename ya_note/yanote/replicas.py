@@ -0,0 +1,97 @@
+"""
+Чтение с реплик базы данных и запись в основную.
+
+ReplicaRouter отправляет чтение на одну из реплик из
+DATABASE_REPLICAS, а запись — в default. Пока список реплик пуст,
+всё идёт в default.
+
+Реплики отстают от основной базы, поэтому ReplicaPinMiddleware
+закрепляет за основной базой запросы, которые пишут (POST и прочие
+небезопасные методы), и запросы того же посетителя в течение
+REPLICA_PIN_SECONDS после них: автор сразу видит свою заметку.
+
+Та же логика есть в yanews/replicas.py: каждый проект подключает
+свой роутер в DATABASE_ROUTERS, общего пакета у проектов нет.
+"""
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DATABASE = 'default'
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_pinned = ContextVar('replica_pinned', default=False)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return PRIMARY_DATABASE
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет запрос за основной базой, см. описание модуля.
+
+    Работает и в синхронной, и в асинхронной цепочке middleware: под
+    ASGI она не переводит всю цепочку в один поток синхронного кода.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как у MiddlewareMixin: обработчик ASGI должен видеть,
+            # что вызов middleware возвращает корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = self.pin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.set_pin_cookie(request, response)
+
+    async def __acall__(self, request):
+        token = self.pin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.set_pin_cookie(request, response)
+
+    def pin(self, request):
+        return _pinned.set(
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+
+    def set_pin_cookie(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -22,6 +22,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: замеряет весь ответ, включая остальные слои.
+    'yanote.instrumentation.InstrumentationMiddleware',
+    # Первым: закрепление за основной базой — до любых запросов к ней.
+    'yanote.replicas.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,11 +58,37 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с WAL и PRAGMA для нагрузки, см. yanote/sqlite3/base.py.
+        'ENGINE': 'yanote.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Соединение живёт между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': 60,
+        # Тесты на параллельное создание заметок работают из нескольких
+        # потоков, а общая база в памяти блокирует таблицы целиком.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # Реплика для чтения; используется, только если указана
+    # в DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'yanote.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db_replica.sqlite3',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['yanote.replicas.ReplicaRouter']
+
+# Алиасы реплик для чтения. Пустой список — всё идёт в default.
+DATABASE_REPLICAS = []
+
+# Сколько секунд после записи читать посетителю из основной базы.
+REPLICA_PIN_SECONDS = 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +117,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 50
+
+NOTES_SEARCH_RESULTS_PER_PAGE = 20
+
+# Замеры запросов и заголовок Server-Timing, см. yanote/instrumentation.py.
+INSTRUMENTATION_ENABLED = True
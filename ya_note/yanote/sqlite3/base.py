@@ -0,0 +1,58 @@
+"""
+SQLite с настройками для работы под нагрузкой.
+
+Подключается через ENGINE = 'yanote.sqlite3'. При открытии каждого
+соединения выполняет PRAGMA из DEFAULT_PRAGMAS; переопределить их
+можно словарём OPTIONS['pragmas'] в DATABASES:
+
+* journal_mode=WAL — читатели не ждут писателя и наоборот;
+* synchronous=NORMAL — в режиме WAL безопасно, fsync только
+  при контрольной точке;
+* mmap_size — чтение страниц базы через отображение в память;
+* cache_size — кэш страниц соединения (отрицательное значение — КиБ);
+* busy_timeout — сколько миллисекунд ждать блокировку вместо
+  немедленной ошибки database is locked.
+
+Транзакции открываются через BEGIN IMMEDIATE: блокировка на запись
+берётся сразу, и конкурирующий писатель ждёт её по busy_timeout.
+При обычном BEGIN транзакция, успевшая прочитать базу, получает
+database is locked без ожидания, если база изменилась до её записи.
+
+Тот же бэкенд лежит в yanews/sqlite3/base.py: у каждого проекта свой ENGINE,
+а общего пакета у независимых проектов нет. Правки вносятся
+в обе копии.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    # Первым: переключение журнала само может ждать блокировку.
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pragmas(self):
+        return {
+            **DEFAULT_PRAGMAS,
+            **self.settings_dict['OPTIONS'].get('pragmas', {}),
+        }
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # Не параметр sqlite3.connect(), а наши PRAGMA.
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.get_pragmas().items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
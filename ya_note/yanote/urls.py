@@ -4,8 +4,12 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from yanote.instrumentation import stats_view
+
 urlpatterns = [
     path('', include('notes.urls')),
+    # До admin.site.urls: иначе адрес займёт раздел админки.
+    path('admin/stats/', stats_view, name='instrumentation'),
     path('admin/', admin.site.urls),
 ]
 